@@ -0,0 +1,97 @@
+"""
+Measure the latency and the peak memory of saving a session (DataHandler.save).
+
+A mono .wav recording and a set of annotated events are generated in a temporary directory, the recording is loaded
+like in the application and the session is saved several times. The peak memory is the largest amount of memory
+that is allocated while saving (measured with tracemalloc), it doesn't depend on the length of the recording if
+the samples are not copied.
+
+Usage (from a checkout, the package doesn't have to be installed):
+    python benchmarks/bench_save.py --minutes 60 --events 10000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from scipy.io.wavfile import write
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+# use the annote package of this checkout
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from PyQt6 import QtWidgets
+
+from annote.helpers import DataHandler
+from annote.helpers.annotation_store import AnnotationStore
+from annote.helpers.data_loading import load_wav_mp3_file
+
+
+def create_session(directory, minutes, events, sampling_rate=44100):
+    """
+    Create a DataHandler with a generated recording and randomly placed annotated events.
+    """
+    path = os.path.join(directory, 'recording.wav')
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(int(minutes * 60 * sampling_rate)) * 3000).astype(np.int16)
+    write(path, sampling_rate, samples)
+    del samples
+
+    data = {'0': load_wav_mp3_file(path, 'Single channel')}
+    labels = {'classes': ['a', 'b', 'c'], 'shortcuts': ['1', '2', '3']}
+    data_handler = DataHandler(data, labels, log=[])
+
+    starts = np.sort(rng.uniform(0, minutes * 60 - 1, events))
+    df = pd.DataFrame({'Initial': np.nan, 'From': starts, 'To': starts + rng.uniform(0.1, 1, events),
+                       'Event': rng.choice(labels['classes'], events), 'Comment': ''})
+    # the events are set without the table and plots of the main window
+    data_handler.annotations = AnnotationStore.from_dataframe(df)
+    return data_handler
+
+
+def bench_save(data_handler, path, repeat):
+    """
+    Save the session repeat times and return the latencies (seconds) and the largest peak memory (bytes).
+    """
+    latencies = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        data_handler.save(path)
+        latencies.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return latencies, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=float, default=30, help="length of the generated recording")
+    parser.add_argument('--events', type=int, default=10000, help="number of annotated events")
+    parser.add_argument('--repeat', type=int, default=5, help="number of measured saves")
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication([])
+    with tempfile.TemporaryDirectory() as directory:
+        data_handler = create_session(directory, args.minutes, args.events)
+        path = os.path.join(directory, 'session.annote')
+        latencies, peak = bench_save(data_handler, path, args.repeat)
+
+        signal_size = data_handler.data['0']['data'].read(0, 1).itemsize * len(data_handler.data['0']['t'])
+        print(f"recording:   {args.minutes:g} min ({signal_size / 2 ** 20:.1f} MiB of samples)")
+        print(f"events:      {args.events}")
+        print(f"latency:     median {statistics.median(latencies) * 1000:.1f} ms, "
+              f"min {min(latencies) * 1000:.1f} ms ({args.repeat} saves)")
+        print(f"peak memory: {peak / 2 ** 20:.2f} MiB")
+        print(f"file size:   {os.path.getsize(path) / 2 ** 20:.2f} MiB")
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
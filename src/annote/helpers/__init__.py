@@ -1,4 +1,6 @@
 from .data_handler import DataHandler
 from .audio_player import AudioPlayer
 from .calculate_md5_hash import get_md5_hash
-from .data_loading import load_wav_mp3_file_metadata
\ No newline at end of file
+from .fingerprint import get_fingerprint, verify_fingerprint
+from .data_loading import load_wav_mp3_file_metadata
+from .background_loader import BackgroundLoader, FileChangedError, LoadingCancelled
\ No newline at end of file
@@ -0,0 +1,94 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt6 import QtCore
+
+
+class AnnotationOverlay(pg.GraphicsObject):
+    """
+    Graphics item that draws all annotated events of one plot.
+
+    Instead of one region item per event, the events in the visible x-range are queried from the interval index of
+    the AnnotationStore when the item is painted and the events of every state (unlabelled, labelled, selected) are
+    drawn with one drawRects call. Events that are closer than a pixel are merged into one rectangle, so the number of
+    drawn rectangles is limited by the width of the plot. The current (last selected) event is not drawn, it is shown
+    as an editable RegionItem by the DataHandler.
+    """
+    UNLABELLED_COLOR = (238, 233, 108, 150)
+    LABELLED_COLOR = (87, 223, 151, 150)
+    SELECTED_COLOR = (204, 97, 212, 150)
+
+    def __init__(self, data_handler):
+        super().__init__()
+        self.data_handler = data_handler
+        self._brushes = [pg.mkBrush(color) for color in
+                         (self.UNLABELLED_COLOR, self.LABELLED_COLOR, self.SELECTED_COLOR)]
+
+    def boundingRect(self):
+        # the item covers the visible range, the events are only clipped to it while painting
+        rect = self.viewRect()
+        return QtCore.QRectF() if rect is None else rect
+
+    def viewTransformChanged(self):
+        """
+        Repaint the item when the plot is panned or zoomed, the visible events change with the x-range.
+        """
+        super().viewTransformChanged()
+        self.prepareGeometryChange()
+        self.update()
+
+    def paint(self, painter, *args):
+        rect = self.viewRect()
+        if rect is None:
+            return
+        annotations = self.data_handler.annotations
+        ids = np.asarray(annotations.overlapping(rect.left(), rect.right()), dtype=np.int64)
+        current = self.data_handler.selected_id
+        if current is not None:
+            ids = ids[ids != current]
+        if len(ids) == 0:
+            return
+
+        starts, stops = annotations.values(ids, 'From'), annotations.values(ids, 'To')
+        labels = annotations.values(ids, 'Event')
+        states = np.array([1 if label else 0 for label in labels], dtype=np.int8)
+        states[np.isin(ids, self.data_handler.selected_ids)] = 2
+
+        # events narrower than a pixel are drawn with a width of one pixel
+        min_width = self.pixelWidth() or 0
+        painter.setPen(pg.mkPen(None))
+        for state, brush in enumerate(self._brushes):
+            mask = states == state
+            if not mask.any():
+                continue
+            rects = [QtCore.QRectF(start, rect.top(), stop - start, rect.height())
+                     for start, stop in zip(*self._merge(starts[mask], stops[mask], min_width))]
+            painter.setBrush(brush)
+            painter.drawRects(rects)
+
+    @staticmethod
+    def _merge(starts, stops, min_width):
+        """
+        Merge intervals (ordered by their start) that overlap or are less than min_width apart.
+        """
+        stops = np.maximum(stops, starts + min_width)
+        ends = np.maximum.accumulate(stops)
+        new = np.ones(len(starts), dtype=bool)
+        new[1:] = starts[1:] > ends[:-1] + min_width
+        first = np.flatnonzero(new)
+        last = np.append(first[1:] - 1, len(starts) - 1)
+        return starts[first].tolist(), ends[last].tolist()
+
+    def mouseClickEvent(self, ev):
+        """
+        Select the shortest event under the mouse with a left click.
+        """
+        if ev.button() != QtCore.Qt.MouseButton.LeftButton:
+            ev.ignore()
+            return
+        annotations = self.data_handler.annotations
+        event_id = annotations.event_at(ev.pos().x())
+        if event_id is None:
+            ev.ignore()
+            return
+        ev.accept()
+        self.data_handler.table_widget.select_row(annotations.row_of(event_id))
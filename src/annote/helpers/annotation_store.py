@@ -0,0 +1,331 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, chain
+
+import numpy as np
+import pandas as pd
+
+from .interval_index import IntervalIndex
+
+
+class SortedKeyList:
+    """
+    Sorted list of keys that is split into blocks of at most 2 * LOAD keys.
+
+    Keys are found with a binary search over the last key of every block and a binary search within the block, so
+    inserting or removing a key only moves the keys of one block instead of the whole list. The position of a key
+    is the number of keys in the preceding blocks, these offsets are only recomputed after the list changed.
+    """
+    LOAD = 256
+
+    def __init__(self, keys=()):
+        keys = sorted(keys)
+        self._blocks = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._offsets = None
+        self._len = len(keys)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return chain.from_iterable(self._blocks)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self._len
+        if not 0 <= position < self._len:
+            raise IndexError(f"Position {position} is out of range for {self._len} keys.")
+        offsets = self._get_offsets()
+        block_index = bisect_right(offsets, position) - 1
+        return self._blocks[block_index][position - offsets[block_index]]
+
+    def add(self, key):
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+        else:
+            block_index = min(bisect_left(self._maxes, key), len(self._maxes) - 1)
+            block = self._blocks[block_index]
+            insort(block, key)
+            self._maxes[block_index] = block[-1]
+            if len(block) > 2 * self.LOAD:
+                self._blocks.insert(block_index + 1, block[self.LOAD:])
+                del block[self.LOAD:]
+                self._maxes.insert(block_index, block[-1])
+        self._len += 1
+        self._offsets = None
+
+    def remove(self, key):
+        block_index, index = self._locate(key)
+        block = self._blocks[block_index]
+        del block[index]
+        if block:
+            self._maxes[block_index] = block[-1]
+        else:
+            del self._blocks[block_index]
+            del self._maxes[block_index]
+        self._len -= 1
+        self._offsets = None
+
+    def index(self, key):
+        """
+        Return the position of a key that is contained in the list.
+        """
+        block_index, index = self._locate(key)
+        return self._get_offsets()[block_index] + index
+
+    def bisect_left(self, key):
+        """
+        Return the position of the first key >= key.
+        """
+        block_index = bisect_left(self._maxes, key)
+        if block_index == len(self._maxes):
+            return self._len
+        return self._get_offsets()[block_index] + bisect_left(self._blocks[block_index], key)
+
+    def _locate(self, key):
+        block_index = bisect_left(self._maxes, key)
+        if block_index < len(self._maxes):
+            block = self._blocks[block_index]
+            index = bisect_left(block, key)
+            if index < len(block) and block[index] == key:
+                return block_index, index
+        raise ValueError(f"{key} is not in the list.")
+
+    def _get_offsets(self):
+        if self._offsets is None:
+            self._offsets = [0] + list(accumulate(len(block) for block in self._blocks))[:-1]
+        return self._offsets
+
+
+class AnnotationStore:
+    """
+    Column-wise storage of the annotated events, ordered by their start time ('From').
+
+    Every event gets a stable integer ID when it is added, the ID stays the same when the event is moved or other
+    events are added or removed. The numeric columns are numpy arrays and the other columns are lists, all indexed
+    by the ID. The order is kept in a SortedKeyList of (From, ID) keys, so adding, removing and moving an event and
+    converting between IDs and table rows don't sort or copy the other events. An IntervalIndex of the events
+    answers which events contain a time, overlap a time range or are closest to a time. The number and the total
+    length of the events of every class ('Event') are updated with every change, so statistics don't scan the events.
+    A DataFrame is only created for saving and exporting (see to_dataframe).
+    """
+    # Columns that are saved and exported
+    COLUMNS = ('Initial', 'From', 'To', 'Event', 'Comment')
+    NUMERIC_COLUMNS = ('Initial', 'From', 'To')
+    DEFAULTS = {'Initial': np.nan, 'Event': '', 'Comment': ''}
+
+    def __init__(self, columns=COLUMNS, capacity=64):
+        """
+        :param columns: names of the columns, must contain 'From' and 'To'
+        :param capacity: initial number of events the numeric columns have space for
+        """
+        self.columns = tuple(columns)
+        self._numeric = {col: np.full(capacity, np.nan) for col in self.columns if col in self.NUMERIC_COLUMNS}
+        self._objects = {col: [] for col in self.columns if col not in self.NUMERIC_COLUMNS}
+        self._order = SortedKeyList()
+        self._intervals = IntervalIndex()
+        self._next_id = 0
+        # number and total length of the events per class
+        self._class_counts = {}
+        self._class_lengths = {}
+
+    @classmethod
+    def from_dataframe(cls, df, columns=COLUMNS):
+        """
+        Create a store from a DataFrame with one row per event (e.g. of a saved file). Missing columns get their
+        default values.
+        """
+        store = cls(columns, capacity=max(len(df), 64))
+        for row in df.to_dict('records'):
+            store._append(row)
+        # both indices are built at once instead of inserting the events one by one
+        ids = np.arange(store._next_id)
+        starts, stops = store._numeric['From'][ids], store._numeric['To'][ids]
+        order = np.argsort(starts, kind='stable')
+        store._order = SortedKeyList(zip(starts[order].tolist(), ids[order].tolist()))
+        store._intervals = IntervalIndex(zip(ids[order].tolist(), starts[order].tolist(), stops[order].tolist()))
+        return store
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        """
+        Iterate over the IDs of the events ordered by their start time.
+        """
+        return (event_id for _, event_id in self._order)
+
+    def __contains__(self, event_id):
+        # removed events have NaN as start time
+        return 0 <= event_id < self._next_id and not np.isnan(self._numeric['From'][event_id])
+
+    def add(self, values):
+        """
+        Add an event (dictionary with the values of the columns) and return its ID.
+        """
+        event_id = self._append(values)
+        self._order.add((self.get(event_id, 'From'), event_id))
+        self._intervals.add(event_id, self.get(event_id, 'From'), self.get(event_id, 'To'))
+        return event_id
+
+    def _append(self, values):
+        """
+        Store the values of a new event without adding it to the indices.
+        """
+        event_id = self._next_id
+        self._next_id += 1
+        capacity = len(self._numeric['From'])
+        if event_id >= capacity:
+            for col, array in self._numeric.items():
+                self._numeric[col] = np.concatenate([array, np.full(capacity, np.nan)])
+        for col in self.columns:
+            value = values.get(col, self.DEFAULTS.get(col))
+            if col in self._numeric:
+                self._numeric[col][event_id] = np.nan if value is None else value
+            else:
+                self._objects[col].append(value)
+        self._add_to_statistics(event_id, 1)
+        return event_id
+
+    def remove(self, event_id):
+        """
+        Remove an event and return its values.
+        """
+        values = self.get(event_id)
+        self._add_to_statistics(event_id, -1)
+        self._order.remove((float(self._numeric['From'][event_id]), event_id))
+        self._intervals.remove(event_id)
+        self._numeric['From'][event_id] = np.nan
+        for col in self._objects:
+            self._objects[col][event_id] = None
+        return values
+
+    def get(self, event_id, column=None):
+        """
+        Return the value of a column of an event, or a dictionary with all values if column is None.
+        """
+        if column is not None:
+            if column in self._numeric:
+                return float(self._numeric[column][event_id])
+            return self._objects[column][event_id]
+        return {col: self.get(event_id, col) for col in self.columns}
+
+    def update(self, event_id, values):
+        """
+        Change the values (dictionary) of an event, the event is moved if its start time changed.
+        """
+        self._add_to_statistics(event_id, -1)
+        if 'From' in values:
+            self._order.remove((float(self._numeric['From'][event_id]), event_id))
+        for col, value in values.items():
+            if col in self._numeric:
+                self._numeric[col][event_id] = np.nan if value is None else value
+            else:
+                self._objects[col][event_id] = value
+        if 'From' in values:
+            self._order.add((float(self._numeric['From'][event_id]), event_id))
+        self._add_to_statistics(event_id, 1)
+        if 'From' in values or 'To' in values:
+            self._intervals.add(event_id, self.get(event_id, 'From'), self.get(event_id, 'To'))
+
+    def row_of(self, event_id):
+        """
+        Return the row (position in the order by start time) of an event.
+        """
+        return self._order.index((float(self._numeric['From'][event_id]), event_id))
+
+    def insertion_row(self, start, event_id=None):
+        """
+        Return the row an event with the start time will have, when it is added (event_id is None) or when the
+        start time of the event with event_id is changed.
+        """
+        if event_id is None:
+            return self._order.bisect_left((start, self._next_id))
+        row = self._order.bisect_left((start, event_id))
+        if (float(self._numeric['From'][event_id]), event_id) < (start, event_id):
+            row -= 1
+        return row
+
+    def id_at(self, row):
+        """
+        Return the ID of the event in a row.
+        """
+        return self._order[row][1]
+
+    def overlapping(self, start, stop):
+        """
+        Return the IDs of the events that overlap the time range [start, stop], ordered by their start time.
+        """
+        return self._intervals.overlapping(start, stop)
+
+    def at(self, t):
+        """
+        Return the IDs of the events that contain the time t, ordered by their start time.
+        """
+        return self._intervals.at(t)
+
+    def event_at(self, t):
+        """
+        Return the ID of the shortest event that contains the time t (the innermost of nested events) or None.
+        """
+        ids = self.at(t)
+        if not ids:
+            return None
+        return min(ids, key=lambda event_id: self._numeric['To'][event_id] - self._numeric['From'][event_id])
+
+    def nearest(self, t, k=1):
+        """
+        Return the IDs of the k events closest to the time t, the closest first.
+        """
+        return self._intervals.nearest(t, k)
+
+    def class_statistics(self, classes, flag='length'):
+        """
+        Return the number (flag='count') or the total length (flag='length') of the events of every class as array.
+        """
+        statistics = self._class_counts if flag == 'count' else self._class_lengths
+        return np.array([statistics.get(event_class, 0) for event_class in classes], dtype=np.float64)
+
+    def _add_to_statistics(self, event_id, sign):
+        """
+        Add (sign=1) or subtract (sign=-1) an event to the statistics of its class.
+        """
+        event_class = self._objects['Event'][event_id]
+        length = float(self._numeric['To'][event_id] - self._numeric['From'][event_id])
+        count = self._class_counts.get(event_class, 0) + sign
+        if count == 0:
+            # the total length is reset, so rounding errors of removed events don't remain
+            del self._class_counts[event_class]
+            del self._class_lengths[event_class]
+        else:
+            self._class_counts[event_class] = count
+            self._class_lengths[event_class] = self._class_lengths.get(event_class, 0.0) + sign * length
+
+    def column(self, column):
+        """
+        Return the values of a column ordered by the start time of the events.
+        """
+        return self.values(self.ids(), column)
+
+    def values(self, ids, column):
+        """
+        Return the values of a column for an array of event IDs.
+        """
+        if column in self._numeric:
+            return self._numeric[column][ids]
+        values = self._objects[column]
+        return [values[event_id] for event_id in ids]
+
+    def ids(self):
+        """
+        Return the IDs of all events ordered by their start time as array.
+        """
+        return np.fromiter(iter(self), dtype=np.int64, count=len(self))
+
+    def to_dataframe(self, columns=COLUMNS):
+        """
+        Return a DataFrame with one row per event ordered by the start time (e.g. for saving and exporting).
+        """
+        return pd.DataFrame({col: self.column(col) for col in columns if col in self.columns},
+                            columns=[col for col in columns if col in self.columns])
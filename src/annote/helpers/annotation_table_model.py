@@ -0,0 +1,124 @@
+import datetime
+
+from PyQt6 import QtCore, QtGui
+
+
+class AnnotationTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model of the annotated events that reads the cells directly from the AnnotationStore of the DataHandler.
+
+    Cells are only formatted when the view asks for them (i.e. for the visible rows). Changes of the events are made
+    through the model, which notifies the views about the inserted, removed, moved or changed rows only, so adding,
+    moving or editing an event doesn't rebuild the table.
+    """
+    HEADERS = (" ", "From", "To", "Event", "Comment")
+    COLUMNS = (None, 'From', 'To', 'Event', 'Comment')
+
+    UNLABELLED_COLOR = QtGui.QColor(238, 233, 108)
+    LABELLED_COLOR = QtGui.QColor(87, 223, 151)
+    SELECTED_COLOR = QtGui.QColor(204, 97, 212)
+    UNSELECTED_COLOR = QtGui.QColor(255, 255, 255)
+    TEXT_COLOR = QtGui.QColor(0, 0, 0)
+
+    def __init__(self, data_handler):
+        super().__init__()
+        self.data_handler = data_handler
+        self._selected_ids = set()
+        data_handler.selection_changed.connect(self._selection_changed)
+
+    @property
+    def annotations(self):
+        return self.data_handler.annotations
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.annotations)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        event_id = self.annotations.id_at(index.row())
+        column = self.COLUMNS[index.column()]
+
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if column is None:
+                return None
+            value = self.annotations.get(event_id, column)
+            if column in ('From', 'To'):
+                return str(datetime.timedelta(seconds=value))[:-4]
+            return str(value)
+        if role == QtCore.Qt.ItemDataRole.BackgroundRole:
+            if column is None:
+                return self.SELECTED_COLOR if event_id in self._selected_ids else self.UNSELECTED_COLOR
+            return self.LABELLED_COLOR if self.annotations.get(event_id, 'Event') else self.UNLABELLED_COLOR
+        if role == QtCore.Qt.ItemDataRole.ForegroundRole:
+            return self.TEXT_COLOR
+        return None
+
+    def reset(self):
+        """
+        Notify the views that all events changed (e.g. after loading annotations).
+        """
+        self.beginResetModel()
+        self._selected_ids = set(self.data_handler.selected_ids)
+        self.endResetModel()
+
+    def add_event(self, values):
+        """
+        Add an event to the AnnotationStore and return its ID.
+        """
+        row = self.annotations.insertion_row(values['From'])
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        event_id = self.annotations.add(values)
+        self.endInsertRows()
+        return event_id
+
+    def remove_event(self, event_id):
+        """
+        Remove an event from the AnnotationStore and return its values.
+        """
+        row = self.annotations.row_of(event_id)
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        values = self.annotations.remove(event_id)
+        self._selected_ids.discard(event_id)
+        self.endRemoveRows()
+        return values
+
+    def update_event(self, event_id, values):
+        """
+        Change the values of an event, its row is moved if the start time changed.
+        """
+        row = self.annotations.row_of(event_id)
+        new_row = row
+        if 'From' in values:
+            new_row = self.annotations.insertion_row(values['From'], event_id)
+        # the destination of beginMoveRows is the row before which the event is inserted before it is removed
+        if new_row != row and self.beginMoveRows(QtCore.QModelIndex(), row, row, QtCore.QModelIndex(),
+                                                 new_row + 1 if new_row > row else new_row):
+            self.annotations.update(event_id, values)
+            self.endMoveRows()
+        else:
+            self.annotations.update(event_id, values)
+        self._row_changed(new_row)
+
+    def _selection_changed(self, selected_ids):
+        """
+        Update the first column of the events whose selection changed.
+        """
+        selected_ids = set(selected_ids)
+        for event_id in self._selected_ids ^ selected_ids:
+            if event_id in self.annotations:
+                row = self.annotations.row_of(event_id)
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index, [QtCore.Qt.ItemDataRole.BackgroundRole])
+        self._selected_ids = selected_ids
+
+    def _row_changed(self, row):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
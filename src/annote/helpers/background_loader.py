@@ -0,0 +1,129 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6 import QtCore
+
+
+class LoadingCancelled(Exception):
+    """
+    Raised inside a loading function when the user cancelled loading.
+    """
+
+
+class FileChangedError(Exception):
+    """
+    Raised inside a loading function when a file doesn't match the fingerprint it was expected to have.
+    """
+    def __init__(self, path):
+        super().__init__(f"File at location '{path}' is not the same as the saved one!")
+        self.path = path
+
+
+class BackgroundLoader(QtCore.QObject):
+    """
+    Loads several data files in parallel in a thread pool and reports to the GUI thread.
+
+    Threads are used instead of processes because the loaded data contains memory-mapped arrays and sample sources
+    that can't be sent between processes without copying them. The expensive parts (hashing, reading and decoding
+    in numpy/soundfile/audioread/pyarrow) release the GIL.
+
+    Each job is a tuple (function, args). The function is called as function(*args, progress_callback=...) and has
+    to return the data dictionary of the file. Jobs that raise FileChangedError don't stop the other jobs, they are
+    reported through file_changed and can be started again with another file through retry().
+    """
+    progress = QtCore.pyqtSignal(str, float)  # key of the file, fraction that is loaded
+    failed = QtCore.pyqtSignal(str, str)  # key of the file, error message
+    file_changed = QtCore.pyqtSignal(str, str)  # key of the file, path of the file that doesn't match its fingerprint
+    finished = QtCore.pyqtSignal(dict)  # all loaded data dictionaries (only emitted if all files were loaded)
+    cancelled = QtCore.pyqtSignal()
+
+    _job_done = QtCore.pyqtSignal(str, object)
+
+    def __init__(self, jobs, max_workers=None):
+        super().__init__()
+        self._jobs = jobs
+        self._max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+        self._cancel_event = threading.Event()
+        self._results = {}
+        self._executor = None
+        self._futures = []
+        self._job_done.connect(self._on_job_done)
+
+    def start(self):
+        """
+        Start loading all files.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max(self._max_workers, 1),
+                                            thread_name_prefix="annote-loader")
+        self._futures = [self._executor.submit(self._run, key, function, args)
+                         for key, (function, args) in self._jobs.items()]
+
+    def retry(self, key, function, args):
+        """
+        Replace the job of a file (e.g. with a file the user selected after file_changed) and start it.
+        """
+        if self._cancel_event.is_set():
+            return
+        self._jobs[key] = (function, args)
+        self._futures.append(self._executor.submit(self._run, key, function, args))
+
+    def cancel(self):
+        """
+        Cancel loading. Files that are already being loaded stop at their next progress report.
+        """
+        if self._cancel_event.is_set():
+            return
+        self._cancel_event.set()
+        self._shutdown()
+        self.cancelled.emit()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _shutdown(self):
+        """
+        Cancel all jobs that didn't start yet and shut down the thread pool without waiting for running jobs.
+
+        The futures are cancelled one by one because shutdown(cancel_futures=True) requires Python 3.9.
+        """
+        for future in self._futures:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _run(self, key, function, args):
+        """
+        Executed in a worker thread.
+        """
+        def progress_callback(fraction):
+            if self._cancel_event.is_set():
+                raise LoadingCancelled()
+            self.progress.emit(key, float(fraction))
+
+        try:
+            result = function(*args, progress_callback=progress_callback)
+        except Exception as e:
+            result = e
+        self._job_done.emit(key, result)
+
+    def _on_job_done(self, key, result):
+        """
+        Executed in the GUI thread when a file was loaded (or loading failed).
+        """
+        if self._cancel_event.is_set():
+            return
+        if isinstance(result, FileChangedError):
+            self.file_changed.emit(key, result.path)
+            return
+        if isinstance(result, Exception):
+            self._cancel_event.set()
+            self._shutdown()
+            self.failed.emit(key, str(result))
+            return
+
+        self._results[key] = result
+        if len(self._results) == len(self._jobs):
+            self._executor.shutdown(wait=False)
+            # keep the order of the jobs
+            self.finished.emit({key: self._results[key] for key in self._jobs})
@@ -0,0 +1,23 @@
+import os
+import sys
+
+
+def get_cache_dir(*subdirs):
+    """
+    Return (and create) the directory where ANNOTE stores its caches.
+
+    The location can be changed with the environment variable ANNOTE_CACHE_DIR. Otherwise the platform's default
+    cache location is used.
+    """
+    base = os.environ.get("ANNOTE_CACHE_DIR")
+    if not base:
+        if sys.platform == "win32":
+            base = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "annote", "cache")
+        elif sys.platform == "darwin":
+            base = os.path.join(os.path.expanduser("~"), "Library", "Caches", "annote")
+        else:
+            base = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+                                "annote")
+    path = os.path.join(base, *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -1,10 +1,8 @@
-import hashlib
+from .fingerprint import hash_file
 
 
 def get_md5_hash(path):
     """
-    Calculates the MD5 hash of a file
+    Calculates the MD5 hash of a file (in chunks and cached, see fingerprint.hash_file)
     """
-    md5_hash = hashlib.md5()
-    md5_hash.update(open(path, 'rb').read())
-    return md5_hash.hexdigest()
+    return hash_file(path, 'md5')
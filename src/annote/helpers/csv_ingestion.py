@@ -0,0 +1,107 @@
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Number of characters that are used to sniff the dialect and the header of a .csv file
+SNIFF_SIZE = 64 * 1024
+# Number of rows that are parsed at once, this bounds the memory used for intermediate DataFrames
+CHUNK_ROWS = 1_000_000
+# Block size for the pyarrow reader (in bytes)
+PYARROW_BLOCK_SIZE = 64 * 1024 * 1024
+
+
+def sniff_csv(path):
+    """
+    Sniff the dialect of a .csv file and read its header.
+
+    Returns a dictionary with 'delimiter', 'quotechar' and 'columns'.
+    """
+    with open(path, newline='') as f:
+        sample = f.read(SNIFF_SIZE)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    columns = next(csv.reader(sample.splitlines(), dialect), [])
+    return {'delimiter': dialect.delimiter, 'quotechar': dialect.quotechar or '"', 'columns': columns}
+
+
+def available_engines():
+    """
+    Return the parsing backends that can be used on this system, the fastest first.
+    """
+    engines = []
+    try:
+        import pyarrow.csv  # noqa: F401
+        engines.append('pyarrow')
+    except ImportError:
+        pass
+    engines.append('c')
+    return engines
+
+
+def iter_csv_chunks(path, columns, dialect=None, engine='auto', progress_callback=None):
+    """
+    Parse only the selected columns of a .csv file in one streaming pass.
+
+    Yields DataFrames with at most CHUNK_ROWS rows (pandas engine) or one pyarrow block. If given,
+    progress_callback is called with the fraction of the file that was read so far.
+    """
+    if dialect is None:
+        dialect = sniff_csv(path)
+    missing = [col for col in columns if col not in dialect['columns']]
+    if missing:
+        raise ValueError(f"Columns {missing} do not exist in {path}.")
+    if engine == 'auto':
+        engine = available_engines()[0]
+
+    column_types = _sample_column_types(path, columns, dialect)
+    file_size = max(os.path.getsize(path), 1)
+    with open(path, 'rb') as f:
+        if engine == 'pyarrow':
+            chunks = _iter_pyarrow_chunks(f, columns, dialect, column_types)
+        elif engine == 'c':
+            # numeric columns are converted by the caller, a single bad value must not abort the whole parse
+            chunks = pd.read_csv(f, usecols=columns, sep=dialect['delimiter'], quotechar=dialect['quotechar'],
+                                 dtype={col: t for col, t in column_types.items() if t is str},
+                                 chunksize=CHUNK_ROWS, engine='c')
+        else:
+            raise ValueError(f"Engine {engine} is not supported.")
+
+        for chunk in chunks:
+            if progress_callback is not None:
+                progress_callback(min(f.tell() / file_size, 1.0))
+            yield chunk
+    if progress_callback is not None:
+        progress_callback(1.0)
+
+
+def _sample_column_types(path, columns, dialect, num_rows=1000):
+    """
+    Find the type of the selected columns from the first rows. Numeric columns are parsed as float64, all others
+    are kept as strings, so the type can't change between chunks.
+    """
+    sample = pd.read_csv(path, usecols=columns, sep=dialect['delimiter'], quotechar=dialect['quotechar'],
+                         nrows=num_rows)
+    return {col: np.float64 if pd.api.types.is_numeric_dtype(sample[col]) else str for col in columns}
+
+
+def _iter_pyarrow_chunks(f, columns, dialect, column_types):
+    """
+    Stream a .csv file with the pyarrow reader and yield one DataFrame per block.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+
+    reader = pv.open_csv(
+        f,
+        read_options=pv.ReadOptions(block_size=PYARROW_BLOCK_SIZE),
+        parse_options=pv.ParseOptions(delimiter=dialect['delimiter'], quote_char=dialect['quotechar']),
+        convert_options=pv.ConvertOptions(
+            include_columns=columns,
+            column_types={col: pa.float64() if t is np.float64 else pa.string() for col, t in column_types.items()}))
+    for batch in reader:
+        yield batch.to_pandas()
@@ -1,24 +1,37 @@
 import csv
 
-import numpy as np
-import pandas as pd
-from PyQt6 import QtWidgets
+from PyQt6 import QtWidgets, QtCore
 from PyQt6.QtMultimedia import QMediaPlayer
-import copy
 import flammkuchen as fl
 from scipy.io.wavfile import write
 import os
 import datetime
 import time
 import math
+import pyqtgraph as pg
 
+from .annotation_overlay import AnnotationOverlay
+from .annotation_store import AnnotationStore
+from .annotation_table_model import AnnotationTableModel
 from .region_item import RegionItem
 
 
 class DataHandler(QtWidgets.QFrame):
     """
-    Class that handles all annotated data within one DataFrame.
+    Class that handles all annotated data within one AnnotationStore.
+
+    The selected events are stored as a set of event IDs, so the selection is found without scanning the events.
+    The last selected event is the current one (e.g. for playing, commenting or moving to the previous/next event),
+    labelling and deleting apply to all selected events.
     """
+    # Emitted with the tuple of the selected event IDs whenever the selection changed
+    selection_changed = QtCore.pyqtSignal(object)
+    # Fields of the data entries that are saved, the samples ('data') and the time axis ('t') are loaded again
+    SAVED_FIELDS = ('path', 'hash', 'channel', 'sampling_rate', 'duration', 'stats', 't_column_name',
+                    'data_column_name', 'epoch_offset')
+    # Interval (ms) in which the regions of the other plots follow a dragged region (about the display refresh rate)
+    DRAG_UPDATE_INTERVAL = 16
+
     def __init__(self, data: dict, labels: dict, log: list = []):
         super().__init__()
         self.data = data
@@ -39,9 +52,25 @@ class DataHandler(QtWidgets.QFrame):
         # QFrame objects that will be initialized in class AnnotatePreciseWidget and set here then
         self.annotate_precise_widget = None
 
-        # dataframe that saves all annotations
+        # store that saves all annotations, events are identified by their ID
         # Initial saves the pos of the upper audio player (--> not really relevant, maybe omit)
-        self.table_data = pd.DataFrame(columns=['Initial', 'From', 'To', 'Event', 'Selected', 'Regions', 'Comment'])
+        self.annotations = AnnotationStore()
+        # AnnotationOverlay objects (one per plot) that draw the events, set in class AnnotatePreciseWidget
+        self.overlays = []
+        # editable region items (one per plot) of the current event, all other events are drawn by the overlays
+        self.selected_regions = []
+        # IDs of the selected events in the order they were selected (dictionary used as ordered set)
+        self._selected_ids = {}
+        self.selection_changed.connect(self._update_selected_regions)
+        # model of the table view, all changes of the events are made through it
+        self.table_model = AnnotationTableModel(self)
+
+        # region of the current event that is dragged, the other regions are synced by a timer while dragging
+        self._dragged_region = None
+        self._drag_timer = QtCore.QTimer(self)
+        self._drag_timer.setSingleShot(True)
+        self._drag_timer.setInterval(self.DRAG_UPDATE_INTERVAL)
+        self._drag_timer.timeout.connect(self._sync_selected_regions)
 
     ##################################################################################
     # Load/Save data
@@ -50,43 +79,25 @@ class DataHandler(QtWidgets.QFrame):
         """
         Method for loading annotations from a .csv-file.
         """
-        self.table_data = df
-        self.table_data['Selected'] = False
-        regions = []
-        for idx in range(len(self.table_data)):
-            regions_ = []
-            for plot in self.plots:
-                region = RegionItem()
-
-                region.setRegion([self.table_data.loc[idx, 'From'], self.table_data.loc[idx, 'To']])
-                region.setMovable(False)
-                region.sigRegionChanged.connect(self.change_selected_region)
-                plot.addItem(region)
-                regions_.append(region)
-            regions.append(regions_)
-        self.table_data['Regions'] = regions
-
-        # this can be removed later but is important to be compatible with old .airway files
-        if 'Comment' not in self.table_data.columns:
-            self.table_data['Comment'] = ['' for _ in range(len(self.table_data))]
-
-        # sort values
-        self.table_data = self.table_data.sort_values(by=['From'], ignore_index=True)
-            
-        self.reload_table()
+        # missing columns (e.g. 'Comment' of old .airway files) get their default values
+        self.annotations = AnnotationStore.from_dataframe(df)
+        self.clear_selection()
+        self.table_model.reset()
+
+        self.update_views()
 
     def save(self, path):
         """
         Method for saving all data to a .airway-file.
         """
-        df = copy.deepcopy(self.table_data)
-        data = copy.deepcopy(self.data)
-        del df['Regions']
-        del df['Selected']
+        df = self.annotations.to_dataframe()
 
-        for key in data.keys():
-            del data[key]['t']
-            del data[key]['data']
+        # only the metadata of the data files is saved (without copying it), the samples and the time axis are
+        # never touched
+        data = {}
+        for key, entry in self.data.items():
+            data[key] = {field: entry[field] for field in self.SAVED_FIELDS if field in entry}
+            data[key]['time_base'] = entry['t'].to_dict()
 
         d = {'Data_Information': data, 'Annotations_DataFrame': df, 'Labels': self.labels, 'Log': self.log}
         fl.save(path, d)
@@ -100,16 +111,20 @@ class DataHandler(QtWidgets.QFrame):
                                                                 "from .wav or .mp3 files.")
             return
 
-        events = self.table_data['Event'].unique()
+        df = self.annotations.to_dataframe()
+        events = df['Event'].unique()
         for event in events:
             class_path = os.path.join(path, f'{event}_{annotations_file_name}')
             os.mkdir(class_path)
             idx = 0
-            for index, row in self.table_data.iterrows():
+            for index, row in df.iterrows():
                 if row['Event'] == event:
-                    sampling_rate = self.data[self.key_currently_selected_audio]['sampling_rate']
+                    entry = self.data[self.key_currently_selected_audio]
+                    sampling_rate = entry['sampling_rate']
                     try:
-                        data = self.data[self.key_currently_selected_audio]['data'][int(row['From'] * sampling_rate):int(row['To'] * sampling_rate), ...]
+                        # only the samples of the event are read from the sample source
+                        data = entry['data'].read(entry['t'].time_to_index(row['From']),
+                                                  entry['t'].time_to_index(row['To']))
                     except:
                         continue
                     write(filename=os.path.join(class_path, f"{event}_{idx}.wav"), rate=sampling_rate, data=data)
@@ -123,15 +138,10 @@ class DataHandler(QtWidgets.QFrame):
         """
         Method for saving all annotated events to .csv-files.
         """
-        df = copy.deepcopy(self.table_data)
-        for index, row in df.iterrows():
-            seconds_from = str(datetime.timedelta(seconds=row["From"]))
-            seconds_to = str(datetime.timedelta(seconds=row["To"]))
-            df.loc[index, 'From'] = seconds_from + f" ({row['From']})"
-            df.loc[index, 'To'] = seconds_to + f" ({row['To']})"
+        df = self.annotations.to_dataframe()
+        for column in ('From', 'To'):
+            df[column] = [str(datetime.timedelta(seconds=seconds)) + f" ({seconds})" for seconds in df[column]]
 
-        del df['Regions']
-        del df['Selected']
         del df['Initial']
         df.to_csv(path, sep=';')
 
@@ -160,6 +170,13 @@ class DataHandler(QtWidgets.QFrame):
                 return True
         return False
 
+    def close(self):
+        """
+        Close the files of all loaded signals (e.g. when the session is replaced or the application is closed).
+        """
+        for entry in self.data.values():
+            entry['data'].close()
+
     ##################################################################################
     # Methods that modify the DataFrame through window events
     ##################################################################################
@@ -168,9 +185,8 @@ class DataHandler(QtWidgets.QFrame):
         Method adds an event ('yellow' event).
         """
         # check if any row is selected --> if yes, no new event can be added until the row in unselected again
-        for index, row in self.table_data.iterrows():
-            if bool(row['Selected']) is True:
-                return
+        if self._selected_ids:
+            return
 
         # get current position/region and add a new event there
         if self.audio_player is not None:
@@ -179,48 +195,28 @@ class DataHandler(QtWidgets.QFrame):
             pos = None
         min_x, max_x = self.regions[0].getRegion()
 
-        regions = []
-        for plot in self.plots:
-            region = RegionItem()
-            region.setRegion([min_x, max_x])
-            region.setMovable(False)
-            region.sigRegionChanged.connect(self.change_selected_region)
-            plot.addItem(region)
-            regions.append(region)
-
-        self.table_data = pd.concat([self.table_data, pd.DataFrame([
-                {'Initial': pos, 'From': min_x, 'To': max_x, 'Event': '', 'Selected': False,
-                 'Regions': regions, 'Comment': ''}])], ignore_index=True)
+        # the event is inserted at its position in the order by start time
+        event_id = self.table_model.add_event({'Initial': pos, 'From': min_x, 'To': max_x, 'Event': '', 'Comment': ''})
 
         self.log.append({'Timestamp': time.time(), 'Action': "ADD", 'From': min_x, 'To': max_x,
                          'Event': '', 'Comment': ''})
 
-        # save last row (which is the one we just added) in a variable
-        # to scroll there later after we sorted the DataFrame
-        last_row = self.table_data.iloc[-1]
-
-        # sort values
-        self.table_data = self.table_data.sort_values(by=['From'], ignore_index=True)
-
-        self.table_widget.reload_table()
+        self.update_views()
 
         # scroll to the row that we just added
-        for index, row in self.table_data.iterrows():
-            if row.equals(last_row):
-                self.table_widget.scroll_to_index(index)
+        self.table_widget.scroll_to_index(self.annotations.row_of(event_id))
 
     def add_precise_event(self, event_idx):
         """
         Method adds a precisely annotated event ('green' event).
         """
-        # first check if we want to annotate an already selected region
-        for index, row in self.table_data.iterrows():
-            if bool(row['Selected']) is True:
-                self.table_data.loc[index, 'Event'] = self.labels['classes'][event_idx]
-                self.reload_table()
-                self._update_region(self.table_data.loc[index, 'Regions'])
-                self.table_widget.scroll_to_index(index)
-                return
+        # first check if we want to annotate already selected regions
+        if self._selected_ids:
+            for event_id in self._selected_ids:
+                self.table_model.update_event(event_id, {'Event': self.labels['classes'][event_idx]})
+            self.update_views()
+            self.table_widget.scroll_to_index(self.annotations.row_of(self.selected_id))
+            return
 
         # if not, the normal region will be used to annotate the selected region
         try:
@@ -238,105 +234,116 @@ class DataHandler(QtWidgets.QFrame):
             msg.exec()
             return
 
-        regions = []
-        for plot in self.plots:
-            region = RegionItem()
-            region.setRegion([min_x, max_x])
-            region.setMovable(False)
-            region.sigRegionChanged.connect(self.change_selected_region)
-            plot.addItem(region)
-            regions.append(region)
-
-        self.table_data = pd.concat([self.table_data, pd.DataFrame([{'Initial': pos, 'From': min_x, 'To': max_x,
-             'Event': self.labels['classes'][event_idx], 'Selected': False, 'Regions': regions, 'Comment': ''}])],
-            ignore_index=True)
+        event_id = self.table_model.add_event({'Initial': pos, 'From': min_x, 'To': max_x,
+                                               'Event': self.labels['classes'][event_idx], 'Comment': ''})
 
         self.log.append({'Timestamp': time.time(), 'Action': "ADD_precise", 'From': min_x, 'To': max_x,
                          'Event': self.labels['classes'][event_idx], 'Comment': ''})
 
-        # save last row (which is the one we just added) in a variable
-        # to scroll there later after we sorted the DataFrame
-        last_row = self.table_data.iloc[-1]
-
-        # sort values
-        self.table_data = self.table_data.sort_values(by=['From'], ignore_index=True)
-
-        self.reload_table()
+        self.update_views()
 
         # scroll to the row that we just added
-        for index, row in self.table_data.iterrows():
-            if row.equals(last_row):
-                self.table_widget.scroll_to_index(index)
+        self.table_widget.scroll_to_index(self.annotations.row_of(event_id))
 
     def delete_selected_row(self):
         """
-        Deletes a selected table entry from the DataFrame.
+        Deletes the selected table entries from the AnnotationStore.
         """
-        for index, row in self.table_data.iterrows():
-            if row['Selected'] is True:
-                reply = QtWidgets.QMessageBox.question(self, 'Delete', f'Do you want to delete the selected row? \n '
-                                                                       f'Event: {row["Event"]}',
-                                                       QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.Cancel,
-                                                       QtWidgets.QMessageBox.StandardButton.Yes)
-                if reply != QtWidgets.QMessageBox.StandardButton.Yes:
-                    return
+        if not self._selected_ids:
+            return
 
-                for plot in self.plots:
-                    for region in self.table_data.loc[index, 'Regions']:
-                        plot.removeItem(region)
-                self.table_data = self.table_data.drop(index)
-                self.table_data = self.table_data.reset_index(drop=True)
-                self.unselect_all()
-                self.reload_table()
-                self.log.append({'Timestamp': time.time(), 'Action': "REMOVE",
-                                 'From': self.table_data.loc[index, 'From'], 'To': self.table_data.loc[index, 'To'],
-                                 'Event': self.table_data.loc[index, 'Event'], 'Comment': ''})
-                break
+        if len(self._selected_ids) == 1:
+            question = f'Do you want to delete the selected row? \n ' \
+                       f'Event: {self.annotations.get(self.selected_id, "Event")}'
+        else:
+            question = f'Do you want to delete the {len(self._selected_ids)} selected rows?'
+        reply = QtWidgets.QMessageBox.question(self, 'Delete', question,
+                                               QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.Cancel,
+                                               QtWidgets.QMessageBox.StandardButton.Yes)
+        if reply != QtWidgets.QMessageBox.StandardButton.Yes:
+            return
+
+        # the selection is cleared once before the events are removed, the views are refreshed once afterwards
+        selected_ids = list(self._selected_ids)
+        self.clear_selection()
+        for event_id in selected_ids:
+            # the values of the removed event are logged (and not the ones of the next event)
+            removed = self.table_model.remove_event(event_id)
+            self.log.append({'Timestamp': time.time(), 'Action': "REMOVE",
+                             'From': removed['From'], 'To': removed['To'],
+                             'Event': removed['Event'], 'Comment': ''})
+        self.set_regions_visible(True)
+        self.set_regions_movable(True)
+        self.update_views()
 
-    def reload_table(self):
+    def update_views(self):
         """
-        Reloading the GUI table.
+        Redraw the events and update the statistics window, the table is updated by the AnnotationTableModel.
         """
-        self.table_widget.reload_table()
+        for overlay in self.overlays:
+            overlay.update()
+        self.table_widget.update_statistics()
 
     def change_selected_region(self):
         """
-        Method that changes the values within the DataFrame when the boundaries of the selected region are changing.
+        Method called on every mouse move while a region of the current event is dragged. Only the regions of the
+        other plots follow (at most every DRAG_UPDATE_INTERVAL ms), the event is changed when dragging is finished.
         """
         region = self.sender()
-        min_x, max_x = region.getRegion()
-
-        if min_x < 0:
-            min_x = 0
-        if max_x > self.max_duration:
-            max_x = self.max_duration
-
-        for index, row in self.table_data.iterrows():
-            if row['Selected'] is True:
-                self.table_data.loc[index, 'From'] = min_x
-                self.table_data.loc[index, 'To'] = max_x
-
-                for regions_ in row['Regions']:
-                    regions_.setRegion([min_x, max_x])
+        if region.event_id is None or region.event_id != self.selected_id:
+            return
+        self._dragged_region = region
+        if not self._drag_timer.isActive():
+            self._drag_timer.start()
 
-                # sort values
-                self.table_data = self.table_data.sort_values(by=['From'], ignore_index=True)
+    def commit_selected_region(self):
+        """
+        Method that changes the boundaries of the current event when dragging its region is finished.
+        """
+        region = self.sender()
+        event_id = region.event_id
+        if event_id is None or event_id != self.selected_id:
+            return
+        self._drag_timer.stop()
+        self._dragged_region = region
+        min_x, max_x = self._sync_selected_regions()
+        self._dragged_region = None
 
-                self.reload_table()
-                break
+        old_min_x, old_max_x = self.annotations.get(event_id, 'From'), self.annotations.get(event_id, 'To')
+        if (min_x, max_x) == (old_min_x, old_max_x):
+            return
+        # the event is moved to its new position in the order by start time
+        self.table_model.update_event(event_id, {'From': min_x, 'To': max_x})
+        self.log.append({'Timestamp': time.time(), 'Action': "CHANGE", 'From': [old_min_x, min_x],
+                         'To': [old_max_x, max_x], 'Event': self.annotations.get(event_id, 'Event'), 'Comment': ''})
+        self.update_views()
+
+    def _sync_selected_regions(self):
+        """
+        Set the regions of all plots to the (clipped) boundaries of the dragged region and return them. Signals are
+        blocked, so setting the regions doesn't trigger further updates.
+        """
+        if self._dragged_region is None:
+            return None
+        min_x, max_x = self._dragged_region.getRegion()
+        min_x = max(min_x, 0)
+        max_x = min(max_x, self.max_duration)
+        for region in self.selected_regions:
+            region.blockSignals(True)
+            region.setRegion([min_x, max_x])
+            region.blockSignals(False)
+        return min_x, max_x
 
     def select_previous_or_next_event(self, x):
         """
         Method for selecting the previous or next annotated event (when clicking the corresponding button/key)
         """
-        if len(self.table_data) == 0:
+        if len(self.annotations) == 0:
             return
 
         currently_selected = None
-        for index, row in self.table_data.iterrows():
-            if bool(row['Selected']) is True:
-                currently_selected = index
-                break
+        if self.selected_id is not None:
+            currently_selected = self.annotations.row_of(self.selected_id)
 
         if currently_selected is None:
             if x == -1:
@@ -346,36 +353,132 @@ class DataHandler(QtWidgets.QFrame):
         else:
             new_index = currently_selected + x
             if new_index == -1:
-                self.reload_table()
+                self.update_views()
                 return
-            elif new_index >= len(self.table_data):
-                new_index = len(self.table_data) - 1
+            elif new_index >= len(self.annotations):
+                new_index = len(self.annotations) - 1
 
         self.unselect_all()
         self.table_widget.select_row(new_index)
 
+    def select_event_at_playhead(self):
+        """
+        Select the event under the playhead (the position of the audio player or the center of the selection
+        region) or the closest event if there is none. Playing is paused, so the event can be edited.
+        """
+        if self.audio_player is not None:
+            t = self.audio_player.position() / 1000
+        else:
+            t = sum(self.regions[0].getRegion()) / 2
+
+        event_id = self.annotations.event_at(t)
+        if event_id is None:
+            nearest = self.annotations.nearest(t)
+            if not nearest:
+                return
+            event_id = nearest[0]
+
+        if self.audio_player is not None and \
+                self.audio_player.playbackState() == self.audio_player.PlaybackState.PlayingState:
+            self.audio_player.pause()
+        if self.selected_ids != (event_id,):
+            self.unselect_all()
+            self.table_widget.select_row(self.annotations.row_of(event_id))
+
+        # move the visible range to the event if it is outside
+        x_min, x_max = self.plots[0].getViewBox().viewRange()[0]
+        start, stop = self.annotations.get(event_id, 'From'), self.annotations.get(event_id, 'To')
+        if stop < x_min or start > x_max:
+            width = x_max - x_min
+            self.plots[0].setXRange(start - width / 2, start + width / 2, padding=0)
+
+    @property
+    def selected_id(self):
+        """
+        ID of the current (last selected) event or None if no event is selected.
+        """
+        return next(reversed(self._selected_ids), None)
+
+    @property
+    def selected_ids(self):
+        """
+        IDs of all selected events in the order they were selected.
+        """
+        return tuple(self._selected_ids)
+
+    def is_selected(self, event_id):
+        return event_id in self._selected_ids
+
+    def select(self, event_id, add=False):
+        """
+        Select an event, it becomes the current event. With add=True the event is added to the current selection,
+        otherwise the other events are unselected.
+        """
+        if not add:
+            self._selected_ids.clear()
+        self._selected_ids.pop(event_id, None)
+        self._selected_ids[event_id] = None
+        self.selection_changed.emit(self.selected_ids)
+
+    def unselect(self, event_id):
+        """
+        Remove an event from the selection.
+        """
+        if event_id not in self._selected_ids:
+            return
+        del self._selected_ids[event_id]
+        self.selection_changed.emit(self.selected_ids)
+
+    def clear_selection(self):
+        """
+        Unselect all events without reloading the table (e.g. when they are removed).
+        """
+        if self._selected_ids:
+            self._selected_ids.clear()
+            self.selection_changed.emit(())
+
     def unselect_all(self):
         """
-        Method for unselecting all events within the table. (I just do it for all entries to keep everything clean.)
+        Method for unselecting all events within the table.
         """
-        for _, row in self.table_data.iterrows():
-            for region in row['Regions']:
-                region.setMovable(False)
-            self._update_region(row['Regions'])
+        self.clear_selection()
 
         self.set_regions_visible(True)
         self.set_regions_movable(True)
-        self.table_data.loc[:, 'Selected'] = False
-        self.reload_table()
+        self.update_views()
 
-    @staticmethod
-    def _update_region(regions):
+    def _update_selected_regions(self):
         """
-        Set visible false and true as workaround to update the regions color inside the PyGraphItem.
+        Show the current event as editable regions (one per plot) that can be moved and resized. The regions are
+        created once and reused for every event that becomes the current one.
         """
-        for region in regions:
-            region.setVisible(False)
-            region.setVisible(True)
+        self._drag_timer.stop()
+        self._dragged_region = None
+        event_id = self.selected_id
+        if event_id is None:
+            for plot, region in zip(self.plots, self.selected_regions):
+                plot.removeItem(region)
+            self.selected_regions = []
+        else:
+            if not self.selected_regions:
+                for plot in self.plots:
+                    region = RegionItem()
+                    region.setBrush(pg.mkColor(AnnotationOverlay.SELECTED_COLOR))
+                    region.setHoverBrush(pg.mkColor(AnnotationOverlay.SELECTED_COLOR))
+                    region.setZValue(20)
+                    region.sigRegionChanged.connect(self.change_selected_region)
+                    region.sigRegionChangeFinished.connect(self.commit_selected_region)
+                    plot.addItem(region)
+                    self.selected_regions.append(region)
+            for region in self.selected_regions:
+                region.event_id = event_id
+                region.blockSignals(True)
+                region.setRegion([self.annotations.get(event_id, 'From'), self.annotations.get(event_id, 'To')])
+                region.blockSignals(False)
+                region.annotations = self.annotations
+                region.table_widget = self.table_widget
+        for overlay in self.overlays:
+            overlay.update()
 
     ##################################################################################
     # Methods to get data for Statistics Window
@@ -387,17 +490,7 @@ class DataHandler(QtWidgets.QFrame):
         if flag != 'count' and flag != 'length':
             raise ValueError("Parameter 'flag' is not valid.")
 
-        y_data = np.zeros(len(labels))
-        for index, event in enumerate(labels):
-            for _, row in self.table_data.iterrows():
-                if row['Event'] == event:
-                    if flag == 'count':
-                        y_data[index] += 1
-                    elif flag == 'length':
-                        length = row['To'] - row['From']
-                        y_data[index] += length
-
-        return y_data
+        return self.annotations.class_statistics(labels, flag)
 
     def set_regions_movable(self, value):
         """
@@ -1,75 +1,292 @@
-import re
 import numpy as np
 import librosa
 import pandas as pd
 import json
-import re
+import os
+import threading
+from collections import OrderedDict
 
-from .calculate_md5_hash import get_md5_hash
+from .fingerprint import fingerprint_cache, get_fingerprint, verify_fingerprint
+from .background_loader import FileChangedError, LoadingCancelled
+from .disk_cache import DiskCache
+from .csv_ingestion import available_engines, iter_csv_chunks, sniff_csv
+from .metadata_probe import clear_metadata_cache, probe_metadata
+from .sample_source import ArraySource, BlockDecodedSource, MemmapWavSource
+from .signal_stats import compute_signal_stats
+from .spectrogram_tiles import tile_cache
+from .time_base import ExplicitTimeBase, NanosecondTimeBase, UniformTimeBase
+from .timestamp_parsing import NAT, infer_timestamp_parser
+from .waveform_pyramid import WaveformPyramid, pyramid_cache, pyramid_cache_key
 
 
-def load_wav_mp3_file(path, channel):
+class DecodedSignalCache:
     """
-    Load wav or mp3 file and return dictionary with data, sampling rate, duration, time axis and hash.
+    LRU cache for decoded signals that is bounded by the number of bytes of the cached samples.
+
+    Only audio files that can neither be memory-mapped nor decoded block by block (see load_wav_mp3_file) are
+    decoded into memory at once, so only those end up in this cache. Entries are keyed by the fingerprint of the file
+    and keep all channels, every channel option is a view on the same cached signal.
+
+    The counters hits, misses and evictions can be used to find a suitable size for a workstation.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the cached signal for the key or None.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value, nbytes):
+        """
+        Add a signal to the cache and evict the least recently used signals until the cache fits into max_bytes.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all cached signals (the counters are kept).
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Return a dictionary with the counters and the current size of the cache.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self.current_bytes, 'max_bytes': self.max_bytes}
+
+
+# Decode-fallback cache shared by the import window and the loading of .annote files (size can be set through
+# ANNOTE_SIGNAL_CACHE_BYTES)
+signal_cache = DecodedSignalCache(int(os.environ.get("ANNOTE_SIGNAL_CACHE_BYTES", 2 * 1024 ** 3)))
+
+# Binary cache for parsed csv columns (size can be set through ANNOTE_CSV_CACHE_BYTES)
+csv_cache = DiskCache('csv', max_bytes=int(os.environ.get("ANNOTE_CSV_CACHE_BYTES", 4 * 1024 ** 3)))
+
+
+def clear_caches():
+    """
+    Remove all cached data: fingerprints, parsed csv columns, waveform pyramids, statistics and the in-memory caches.
+    """
+    signal_cache.clear()
+    tile_cache.clear()
+    clear_metadata_cache()
+    fingerprint_cache.clear()
+    csv_cache.clear()
+    pyramid_cache.clear()
+
+
+def _scaled_progress(progress_callback, start, end):
+    """
+    Map the progress of a single loading step to the range [start, end] of the overall progress.
+    """
+    if progress_callback is None:
+        return None
+    return lambda fraction: progress_callback(start + fraction * (end - start))
+
+
+def _get_verified_fingerprint(path, expected_fingerprint=None, progress_callback=None):
+    """
+    Return the fingerprint of a file (see fingerprint.get_fingerprint).
+
+    If expected_fingerprint is given (e.g. the hash stored in a .annote file), a FileChangedError is raised if the
+    file doesn't match it. Fingerprints of older versions use another hash algorithm, the file is hashed a second time
+    with that algorithm in this case.
+    """
+    if expected_fingerprint is None:
+        return get_fingerprint(path, progress_callback=progress_callback)
+    fingerprint = get_fingerprint(path, progress_callback=_scaled_progress(progress_callback, 0, 0.5))
+    if fingerprint != expected_fingerprint and \
+            not verify_fingerprint(path, expected_fingerprint, _scaled_progress(progress_callback, 0.5, 1.0)):
+        raise FileChangedError(path)
+    if progress_callback is not None:
+        progress_callback(1.0)
+    return fingerprint
+
+
+def load_wav_mp3_file(path, channel, progress_callback=None, expected_fingerprint=None):
+    """
+    Load wav or mp3 file and return dictionary with data, sampling rate, duration, time axis and hash. The time
+    axis is a UniformTimeBase that computes the time values on demand.
+
+    Uncompressed .wav files are memory-mapped, compressed files (.mp3, .flac, ...) are decoded block by block when
+    they are read. Only files that soundfile can't seek in are decoded into memory at once; those are kept in the
+    signal_cache, so loading the same file again doesn't decode it a second time. In all cases 'data' is a
+    SampleSource that keeps all channels and applies the selected channel option when it is sliced, other channels
+    are available as views through data.with_channel(). 'stats' holds the statistics of the selected channel option
+    (see signal_stats.compute_signal_stats) if the waveform pyramid of the file was cached before, None otherwise.
+    The statistics are collected while the pyramid is built in the background (see WaveformPyramid.build), so the
+    samples aren't read or decoded while loading. If given, progress_callback is called with the fraction of the
+    file that was loaded so far. If expected_fingerprint is given, a FileChangedError is raised if the
+    file doesn't match it.
     """
     d = {'path': path}
     try:
-        data, sampling_rate = librosa.load(path, sr=None, mono=False)
-        d['sampling_rate'] = sampling_rate
+        # the probe was usually already done in the import window and is cached, so this is cheap
+        metadata = probe_metadata(path)
+        d['hash'] = _get_verified_fingerprint(path, expected_fingerprint, progress_callback)
+        if MemmapWavSource.is_supported(metadata):
+            source = MemmapWavSource(path, metadata, channel)
+        elif BlockDecodedSource.is_supported(path):
+            source = BlockDecodedSource(path, channel)
+        else:
+            # all channels are kept, so the cached signal serves every channel option
+            source = signal_cache.get(d['hash'])
+            if source is None:
+                data, sampling_rate = librosa.load(path, sr=None, mono=False)
+                source = ArraySource(np.transpose(data), sampling_rate)
+                signal_cache.put(d['hash'], source, data.nbytes)
+            source = source.with_channel(channel)
+        d['sampling_rate'] = source.sampling_rate
+        pyramid = WaveformPyramid.load_cached(pyramid_cache_key(d, channel))
+        d['stats'] = pyramid.stats if pyramid is not None else None
+    except (LoadingCancelled, FileChangedError):
+        raise
     except Exception as e:
         raise RuntimeError(f"Can't load the file {path}: str({e})")
 
     d['channel'] = channel
-    if channel == "Single channel":
-        d['data'] = data
-    elif channel == "Left channel":
-        data = np.transpose(data)
-        d['data'] = data[..., 0]
-    elif channel == "Right channel":
-        data = np.transpose(data)
-        d['data'] = data[..., 1]
-    elif channel == "Average of channels":
-        d['data'] = librosa.to_mono(data)
-    else:
-        raise RuntimeError(f"Option {channel} was not defined.")
+    d['data'] = source
 
     # Add duration and time axis (x-axis)
-    d['duration'] = len(d['data']) / d['sampling_rate']
-    d['t'] = np.linspace(0, len(d['data']) / d['sampling_rate'], len(d['data']))
-
-    d['hash'] = get_md5_hash(path)
+    d['t'] = UniformTimeBase(0, d['sampling_rate'], len(d['data']))
+    d['duration'] = d['t'].duration
     return d
 
 
-def load_csv_file(path, t_column_name, data_column_name):
+def load_csv_file(path, t_column_name, data_column_name, progress_callback=None, expected_fingerprint=None):
     """
-    Load csv file and return dictionary with data, time axis, duration and hash.
+    Load csv file and return dictionary with data, time axis (TimeBase), duration and hash. For datetime and
+    numeric epoch time columns the time axis holds the nanoseconds since the first timestamp (NanosecondTimeBase),
+    which is stored as 'epoch_offset' (nanoseconds since 1970-01-01). 'stats' holds the statistics of the data
+    column (see signal_stats.compute_signal_stats).
+
+    Both columns are parsed in one streaming pass (see csv_ingestion.iter_csv_chunks). The pyarrow engine is used
+    if it is installed, the pandas C engine otherwise. The parsed arrays are stored in a binary cache keyed by the
+    fingerprint of the file and the column names, so loading the same file again only memory-maps the arrays.
+    If given, progress_callback is called with the fraction of the file that was loaded so far. If
+    expected_fingerprint is given, a FileChangedError is raised if the file doesn't match it.
     """
     d = {'path': path, 't_column_name': t_column_name, 'data_column_name': data_column_name}
 
-    # Load selected time axis column from csv
     try:
-        df = pd.read_csv(path, usecols=[t_column_name])
-
-        df[t_column_name] = pd.to_datetime(df[t_column_name], errors='coerce')
-        
-        if df[t_column_name].notna().all():
-            d['t_labels'] = df[t_column_name].copy()
-            df[t_column_name] = (df[t_column_name] - df[t_column_name].iloc[0]).dt.total_seconds()
-
-        d['t'] = df[t_column_name].dropna().to_numpy()
+        d['hash'] = _get_verified_fingerprint(path, expected_fingerprint, _scaled_progress(progress_callback, 0, 0.2))
+        cache_key = csv_cache.make_key(d['hash'], t_column_name, data_column_name)
+        cached = csv_cache.load(cache_key)
+        if cached is not None:
+            arrays, meta = cached
+            t, data = arrays['t'], arrays['data']
+            epoch_offset = meta.get('epoch_offset')
+            if epoch_offset is None and 't_labels' in arrays:
+                # entries written by older versions contain all timestamps instead of the offset
+                epoch_offset = int(arrays['t_labels'][0].astype(np.int64))
+            stats = meta.get('stats') or compute_signal_stats(data)
+            if progress_callback is not None:
+                progress_callback(1.0)
+        else:
+            dialect = sniff_csv(path)
+            engines = available_engines()
+            for engine in engines:
+                try:
+                    t, epoch_offset, data = _read_csv_signal(path, t_column_name, data_column_name, dialect, engine,
+                                                             _scaled_progress(progress_callback, 0.2, 0.95))
+                    break
+                except LoadingCancelled:
+                    raise
+                except Exception:
+                    # e.g. pyarrow is stricter about values that don't match the column type, retry with next engine
+                    if engine == engines[-1]:
+                        raise
 
-        # Load selected data column from csv
-        df = pd.read_csv(path, usecols=[data_column_name])
-        d['data'] = df[data_column_name].dropna().to_numpy()
+            stats = compute_signal_stats(data, _scaled_progress(progress_callback, 0.95, 1.0))
+            # entries of older versions of the same file and columns are replaced
+            csv_cache.store(cache_key, {'t': t, 'data': data},
+                            meta={'path': os.path.abspath(path), 'epoch_offset': epoch_offset, 'stats': stats},
+                            group=[os.path.abspath(path), t_column_name, data_column_name])
+    except (LoadingCancelled, FileChangedError):
+        raise
     except Exception as e:
         raise RuntimeError(f"Can't load the file {path}: str({e})")
 
-    d['duration'] = duration = d['t'][-1]
-    d['hash'] = get_md5_hash(path)
+    if epoch_offset is not None:
+        d['epoch_offset'] = epoch_offset
+    # entries written by older versions contain the time axis of datetime columns in seconds
+    d['t'] = NanosecondTimeBase(t) if t.dtype == np.int64 else ExplicitTimeBase(t)
+    d['data'] = ArraySource(data)
+    d['stats'] = stats
+
+    d['duration'] = d['t'].end
     return d
 
 
+def _read_csv_signal(path, t_column_name, data_column_name, dialect, engine, progress_callback):
+    """
+    Read the time and data column of a csv file chunk by chunk.
+
+    Time columns are either numeric (seconds) or timestamps, which are parsed with a format that is inferred from
+    the first chunk (see timestamp_parsing.infer_timestamp_parser). Returns the time axis in seconds (float64) or in
+    nanoseconds since the first timestamp (int64), the epoch offset of timestamps in nanoseconds (or None) and the
+    data.
+    """
+    t_parts, data_parts = [], []
+    parser = None
+    t_is_numeric = None
+    for chunk in iter_csv_chunks(path, [t_column_name, data_column_name], dialect, engine, progress_callback):
+        if t_is_numeric is None:
+            parser = infer_timestamp_parser(chunk[t_column_name])
+            t_is_numeric = parser is None
+        if t_is_numeric:
+            t_parts.append(pd.to_numeric(chunk[t_column_name], errors='coerce').to_numpy(dtype=np.float64))
+        else:
+            t_parts.append(parser.parse(chunk[t_column_name]))
+        data_parts.append(pd.to_numeric(chunk[data_column_name], errors='coerce').to_numpy(dtype=np.float64))
+
+    if len(t_parts) == 0:
+        raise ValueError("The file doesn't contain any rows.")
+    t = np.concatenate(t_parts)
+    data = np.concatenate(data_parts)
+    del t_parts, data_parts
+
+    epoch_offset = None
+    if t_is_numeric:
+        t = t[~np.isnan(t)]
+    else:
+        t = t[t != NAT]
+        if len(t) == 0:
+            raise ValueError(f"The column {t_column_name} doesn't contain any valid timestamps.")
+        epoch_offset = int(t[0])
+        t -= epoch_offset
+    data = data[~np.isnan(data)]
+    return t, epoch_offset, data
+
+
 def load_labels(path):
     """
     Load labels from json file.
@@ -86,29 +303,16 @@ def load_labels(path):
 
 def load_wav_mp3_file_metadata(path):
     """
-    Load wav or mp3 file and return dictionary with sampling rate, duration and number of channels.
+    Read the header of a wav or mp3 file and return dictionary with sampling rate, duration and number of channels.
     """
-    try:
-        data, sampling_rate = librosa.load(path, sr=None, mono=False)
-        data = np.transpose(data)
-        duration = int(len(data) / sampling_rate)
-        num_channels = data.shape[1] if data.ndim == 2 else 1
-    except Exception as e:
-        raise RuntimeError(f"Can't load the file {path}: str({e})")
-    d = {'sampling_rate': sampling_rate, 'duration': duration, 'num_channels': num_channels}
+    metadata = probe_metadata(path)
+    d = {'sampling_rate': metadata['sampling_rate'], 'duration': int(metadata['duration']),
+         'num_channels': metadata['num_channels']}
     return d
 
 
-def load_csv_metadata(path, delimiter=","):
+def load_csv_metadata(path):
     """
-    Load csv file and return dictionary with number of columns, number of rows and column names.
+    Read the header of a csv file (with sniffed delimiter) and return list of column names.
     """
-    with open(path) as f:
-        w = f.readline()
-    w_sep = w.split(delimiter)
-
-    cols = []
-    for col in w_sep:
-        col = re.sub(r"\n", "", col)
-        cols.append(col)
-    return cols
+    return probe_metadata(path)['columns']
@@ -0,0 +1,53 @@
+import numpy as np
+import pyqtgraph as pg
+
+
+class DateTimeAxisItem(pg.DateAxisItem):
+    """
+    Axis that shows the x-values (seconds relative to the first sample) as date and time labels.
+
+    Tick positions and labels are generated from the visible range only whenever the axis is drawn, using the epoch
+    offset (nanoseconds since 1970-01-01 of the first sample). Without an epoch offset it behaves like a plain
+    AxisItem, so the same axis can be reused for signals with and without datetime time columns.
+    """
+    def __init__(self, epoch_offset=None, orientation='bottom', **kwargs):
+        # datetimes of the .csv files are naive, they are shown as they are without a timezone conversion
+        super().__init__(orientation=orientation, utcOffset=0, **kwargs)
+        self.epoch_offset = epoch_offset
+
+    def set_epoch_offset(self, epoch_offset):
+        self.epoch_offset = epoch_offset
+        self.picture = None
+        self.update()
+
+    def tickValues(self, minVal, maxVal, size):
+        if self.epoch_offset is None:
+            return pg.AxisItem.tickValues(self, minVal, maxVal, size)
+        offset = self.epoch_offset / 1e9
+        ticks = super().tickValues(minVal + offset, maxVal + offset, size)
+        return [(spacing, [value - offset for value in values]) for spacing, values in ticks]
+
+    def tickStrings(self, values, scale, spacing):
+        if self.epoch_offset is None:
+            return pg.AxisItem.tickStrings(self, values, scale, spacing)
+        if len(values) == 0:
+            return []
+        times = (self.epoch_offset + np.round(np.asarray(values, dtype=np.float64) * 1e9).astype(np.int64)) \
+            .astype('datetime64[ns]')
+        if spacing >= 24 * 3600:
+            unit = 'D'
+        elif spacing >= 60:
+            unit = 'm'
+        elif spacing >= 1:
+            unit = 's'
+        elif spacing >= 1e-3:
+            unit = 'ms'
+        else:
+            unit = 'us'
+        strings = np.datetime_as_string(times, unit=unit)
+        if unit == 'D':
+            return strings.tolist()
+        # ticks show the time of day, only ticks at midnight show the date instead
+        parts = np.char.partition(strings, 'T')
+        midnight = times == times.astype('datetime64[D]')
+        return np.where(midnight, parts[:, 0], parts[:, 2]).tolist()
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+
+from .cache_directory import get_cache_dir
+
+
+class DiskCache:
+    """
+    Directory based cache for numpy arrays.
+
+    Every entry is a sub directory that contains one .npy file per array and a meta.json. Arrays are memory-mapped
+    when they are loaded. Entries that belong to the same group (e.g. the same source file and columns) replace each
+    other, so entries of files that have changed are removed automatically. If max_bytes is given, the least
+    recently used entries are evicted whenever the cache grows larger.
+    """
+    VERSION = 1
+
+    def __init__(self, namespace, max_bytes=None):
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        return get_cache_dir(self.namespace)
+
+    def make_key(self, *parts):
+        """
+        Create a key from arbitrary json serializable parts (e.g. fingerprint and column names).
+        """
+        return hashlib.sha1(json.dumps([self.VERSION, *parts]).encode()).hexdigest()
+
+    def load(self, key):
+        """
+        Return (arrays, meta) of an entry or None if it doesn't exist. Arrays are memory-mapped read-only.
+        """
+        entry_dir = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(entry_dir, 'meta.json')) as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode='r')
+                      for name in meta['arrays']}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # the modification time of meta.json marks when an entry was used last (for the eviction)
+        try:
+            os.utime(os.path.join(entry_dir, 'meta.json'))
+        except OSError:
+            pass
+        return arrays, meta
+
+    def store(self, key, arrays, meta=None, group=None):
+        """
+        Write arrays to the cache. If group is given, all other entries of the same group are removed.
+        """
+        meta = dict(meta or {})
+        meta['arrays'] = list(arrays.keys())
+        # normalize the group the same way it is read back from meta.json
+        meta['group'] = group = json.loads(json.dumps(group))
+
+        tmp_dir = None
+        try:
+            directory = self.directory
+            # write into a temporary directory first, so readers never see incomplete entries
+            tmp_dir = os.path.join(directory, f".tmp_{uuid.uuid4().hex}")
+            os.makedirs(tmp_dir)
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+
+            with self._lock:
+                entry_dir = os.path.join(directory, key)
+                if os.path.exists(entry_dir):
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(tmp_dir, entry_dir)
+                if group is not None:
+                    self._remove_group(group, keep=key)
+                if self.max_bytes is not None:
+                    self._evict(keep=key)
+        except OSError:
+            # the cache is only an optimization, failing to write it must not break loading files
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def remove(self, key):
+        """
+        Remove a single entry.
+        """
+        shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+
+    def clear(self):
+        """
+        Remove all entries of this cache.
+        """
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def size(self):
+        """
+        Return the number of bytes used by all entries.
+        """
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        """
+        Return a list of (key, last use, size in bytes) of all entries.
+        """
+        entries = []
+        directory = self.directory
+        for key in os.listdir(directory):
+            entry_dir = os.path.join(directory, key)
+            if key.startswith('.tmp_') or not os.path.isdir(entry_dir):
+                continue
+            try:
+                last_use = os.stat(os.path.join(entry_dir, 'meta.json')).st_mtime
+                size = sum(f.stat().st_size for f in os.scandir(entry_dir) if f.is_file())
+            except OSError:
+                continue
+            entries.append((key, last_use, size))
+        return entries
+
+    def _evict(self, keep):
+        """
+        Remove the least recently used entries (except 'keep') until the cache fits into max_bytes.
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total_size = sum(size for _, _, size in entries)
+        for key, _, size in entries:
+            if total_size <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            total_size -= size
+
+    def _remove_group(self, group, keep):
+        """
+        Remove all entries of a group except the entry 'keep'.
+        """
+        for key in os.listdir(self.directory):
+            if key == keep or key.startswith('.tmp_'):
+                continue
+            try:
+                with open(os.path.join(self.directory, key, 'meta.json')) as f:
+                    entry_group = json.load(f).get('group')
+            except (OSError, ValueError):
+                continue
+            if entry_group == group:
+                shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
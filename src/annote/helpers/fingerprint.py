@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+
+from .cache_directory import get_cache_dir
+
+
+DEFAULT_ALGORITHM = 'blake2b'
+# Files are hashed in chunks of this size, so they never have to be read into memory at once
+CHUNK_SIZE = 4 * 1024 * 1024
+
+_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha256': hashlib.sha256,
+    'blake2b': lambda: hashlib.blake2b(digest_size=32),
+}
+
+
+class FingerprintCache:
+    """
+    Persistent cache of file digests keyed by (path, size, mtime_ns).
+
+    Unchanged files are verified without reading them again. The cache is stored as .json file in the cache
+    directory and written through on every new entry.
+    """
+    def __init__(self, path=None):
+        self._path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def get(self, path, algorithm, stat):
+        """
+        Return the cached digest or None if the file is unknown or has changed.
+        """
+        with self._lock:
+            entry = self._load().get(self._key(path, algorithm))
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['digest']
+        return None
+
+    def set(self, path, algorithm, stat, digest):
+        """
+        Add a digest to the cache and write the cache to disk.
+        """
+        with self._lock:
+            entries = self._load()
+            entries[self._key(path, algorithm)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                                   'digest': digest}
+            self._write(entries)
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries = {}
+            self._write(self._entries)
+
+    @staticmethod
+    def _key(path, algorithm):
+        return f"{algorithm}|{os.path.abspath(path)}"
+
+    def _file_path(self):
+        if self._path is None:
+            self._path = os.path.join(get_cache_dir(), 'fingerprints.json')
+        return self._path
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self._file_path()) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _write(self, entries):
+        # the cache is only an optimization, failing to write it must not break loading files
+        try:
+            tmp_path = self._file_path() + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self._file_path())
+        except OSError:
+            pass
+
+
+fingerprint_cache = FingerprintCache()
+
+
+def hash_file(path, algorithm=DEFAULT_ALGORITHM, progress_callback=None):
+    """
+    Return the hex digest of a file. The file is read in chunks and the result is cached persistently.
+
+    If given, progress_callback is called with the fraction of the file that was hashed so far.
+    """
+    if algorithm not in _ALGORITHMS:
+        raise ValueError(f"Hash algorithm {algorithm} is not supported.")
+
+    stat = os.stat(path)
+    digest = fingerprint_cache.get(path, algorithm, stat)
+    if digest is not None:
+        return digest
+
+    file_hash = _ALGORITHMS[algorithm]()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            file_hash.update(chunk)
+            if progress_callback is not None:
+                progress_callback(f.tell() / max(stat.st_size, 1))
+    digest = file_hash.hexdigest()
+    fingerprint_cache.set(path, algorithm, stat, digest)
+    return digest
+
+
+def get_fingerprint(path, algorithm=DEFAULT_ALGORITHM, progress_callback=None):
+    """
+    Return the fingerprint of a file in the form '<algorithm>:<hex digest>'.
+    """
+    return f"{algorithm}:{hash_file(path, algorithm, progress_callback)}"
+
+
+def verify_fingerprint(path, fingerprint, progress_callback=None):
+    """
+    Check if a file matches a stored fingerprint.
+
+    Fingerprints without algorithm prefix are MD5 digests written by older versions of ANNOTE.
+    """
+    algorithm, _, digest = fingerprint.rpartition(':')
+    if not algorithm:
+        algorithm = 'md5'
+    return hash_file(path, algorithm, progress_callback) == digest
@@ -0,0 +1,212 @@
+import heapq
+import random
+
+
+class _Node:
+    __slots__ = ('key', 'start', 'stop', 'priority', 'left', 'right', 'min_start', 'max_stop')
+
+    def __init__(self, interval_id, start, stop, priority):
+        self.key = (start, interval_id)
+        self.start = start
+        self.stop = stop
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.min_start = start
+        self.max_stop = stop
+
+
+def _update(node):
+    """
+    Recompute the bounds of the subtree of a node from its children.
+    """
+    node.min_start = node.left.min_start if node.left is not None else node.start
+    node.max_stop = node.stop
+    if node.left is not None and node.left.max_stop > node.max_stop:
+        node.max_stop = node.left.max_stop
+    if node.right is not None and node.right.max_stop > node.max_stop:
+        node.max_stop = node.right.max_stop
+
+
+def _split(node, key):
+    """
+    Split a subtree into the nodes with keys < key and the nodes with keys >= key.
+    """
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    """
+    Merge two subtrees, all keys of left must be smaller than the keys of right.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _remove(node, key):
+    if node.key == key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    _update(node)
+    return node
+
+
+class IntervalIndex:
+    """
+    Index of closed intervals [start, stop] (e.g. the annotated events) for point, overlap and nearest queries.
+
+    The intervals are stored in a treap ordered by (start, ID), every node also stores the smallest start and the
+    largest stop of its subtree. Queries skip all subtrees that end before or start after the queried range instead
+    of scanning all intervals, for annotations (short, rarely nested intervals) a query with k results takes
+    O(log n + k). Adding and removing an interval takes O(log n) (expected).
+    """
+    def __init__(self, intervals=()):
+        """
+        :param intervals: iterable of (ID, start, stop) tuples, the index is built in linear time if they are sorted
+        """
+        self._root = None
+        self._nodes = {}
+        self._random = random.Random(0)
+        self._build(intervals)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, interval_id):
+        return interval_id in self._nodes
+
+    def add(self, interval_id, start, stop):
+        if interval_id in self._nodes:
+            self.remove(interval_id)
+        node = _Node(interval_id, start, stop, self._random.random())
+        self._nodes[interval_id] = node
+        left, right = _split(self._root, node.key)
+        self._root = _merge(_merge(left, node), right)
+
+    def remove(self, interval_id):
+        node = self._nodes.pop(interval_id)
+        self._root = _remove(self._root, node.key)
+
+    def overlapping(self, start, stop):
+        """
+        Return the IDs of all intervals that overlap [start, stop], ordered by their start.
+        """
+        result = []
+        stack = []
+        node = self._root
+        # in-order traversal that skips subtrees ending before start and nodes (and right subtrees) after stop
+        while stack or node is not None:
+            if node is not None:
+                if node.max_stop < start:
+                    node = None
+                    continue
+                stack.append(node)
+                node = node.left
+                continue
+            node = stack.pop()
+            if node.start > stop:
+                break
+            if node.stop >= start:
+                result.append(node.key[1])
+            node = node.right
+        return result
+
+    def at(self, t):
+        """
+        Return the IDs of all intervals that contain t, ordered by their start.
+        """
+        return self.overlapping(t, t)
+
+    def nearest(self, t, k=1):
+        """
+        Return the IDs of the k intervals closest to t (intervals containing t have a distance of 0), the closest
+        first.
+
+        Subtrees are visited best first, ordered by the smallest distance any of their intervals can have.
+        """
+        result = []
+        if self._root is None or k <= 0:
+            return result
+        # entries are (distance, tie breaker, is_interval, node)
+        heap = [(self._subtree_distance(self._root, t), 0, False, self._root)]
+        counter = 1
+        while heap and len(result) < k:
+            distance, _, is_interval, node = heapq.heappop(heap)
+            if is_interval:
+                result.append(node.key[1])
+                continue
+            interval_distance = max(node.start - t, t - node.stop, 0)
+            heapq.heappush(heap, (interval_distance, counter, True, node))
+            counter += 1
+            for child in (node.left, node.right):
+                if child is not None:
+                    heapq.heappush(heap, (self._subtree_distance(child, t), counter, False, child))
+                    counter += 1
+        return result
+
+    def get(self, interval_id):
+        """
+        Return start and stop of an interval.
+        """
+        node = self._nodes[interval_id]
+        return node.start, node.stop
+
+    @staticmethod
+    def _subtree_distance(node, t):
+        return max(node.min_start - t, t - node.max_stop, 0)
+
+    def _build(self, intervals):
+        """
+        Build the treap from intervals with a stack (Cartesian tree), sorting them first if needed.
+        """
+        nodes = [_Node(interval_id, start, stop, self._random.random()) for interval_id, start, stop in intervals]
+        if any(nodes[i].key > nodes[i + 1].key for i in range(len(nodes) - 1)):
+            nodes.sort(key=lambda node: node.key)
+        stack = []
+        for node in nodes:
+            last = None
+            while stack and stack[-1].priority < node.priority:
+                last = stack.pop()
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        self._nodes = {node.key[1]: node for node in nodes}
+        self._root = stack[0] if stack else None
+        self._update_all(self._root)
+
+    @staticmethod
+    def _update_all(root):
+        """
+        Compute the bounds of all subtrees bottom up (iteratively, the treap is only balanced in expectation).
+        """
+        order = []
+        stack = [root] if root is not None else []
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(child for child in (node.left, node.right) if child is not None)
+        for node in reversed(order):
+            _update(node)
@@ -0,0 +1,326 @@
+import os
+import struct
+import threading
+
+import numpy as np
+
+from .csv_ingestion import sniff_csv
+
+
+# Number of bytes that are read from the beginning of a file to find headers/frame syncs
+_HEADER_SCAN_SIZE = 64 * 1024
+# Chunk size used when streaming through a file (e.g. counting CSV rows)
+_STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Results are cached by (absolute path, size, mtime_ns) so that the import window, the final load and the
+# reopening of .annote files share the same probe.
+_probe_cache = {}
+_probe_cache_lock = threading.Lock()
+
+# MPEG audio lookup tables (index: version id -> layer -> bitrate index)
+_MPEG_VERSIONS = {0: 2.5, 2: 2, 3: 1}
+_MPEG_LAYERS = {1: 3, 2: 2, 3: 1}
+_MPEG_SAMPLING_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+_MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+
+def probe_metadata(path):
+    """
+    Return a dictionary with the metadata of a data file without decoding its samples.
+
+    For audio files the dictionary contains at least 'format', 'sampling_rate', 'num_channels', 'num_frames' and
+    'duration' (in seconds). For .csv files it contains 'format', 'columns', 'num_columns', 'num_rows' and
+    'delimiter'. Results are cached by path, size and modification time.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _probe_cache_lock:
+        if key in _probe_cache:
+            return dict(_probe_cache[key])
+
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == ".csv":
+            d = _probe_csv(path)
+        else:
+            d = _probe_audio(path, extension, stat.st_size)
+    except Exception as e:
+        raise RuntimeError(f"Can't load the file {path}: {e}")
+
+    d['path'] = path
+    d['file_size'] = stat.st_size
+    with _probe_cache_lock:
+        _probe_cache[key] = d
+    return dict(d)
+
+
+def clear_metadata_cache():
+    """
+    Remove all cached probe results.
+    """
+    with _probe_cache_lock:
+        _probe_cache.clear()
+
+
+def _probe_audio(path, extension, file_size):
+    """
+    Read the container header of an audio file. Falls back to soundfile and finally to a full decode if the
+    container can't be parsed.
+    """
+    probes = {".wav": _probe_wav, ".flac": _probe_flac, ".mp3": _probe_mp3}
+    if extension in probes:
+        with open(path, 'rb') as f:
+            d = probes[extension](f, file_size)
+        if d is not None:
+            d['duration'] = d['num_frames'] / d['sampling_rate']
+            return d
+    return _probe_audio_fallback(path)
+
+
+def _probe_wav(f, file_size):
+    """
+    Parse the RIFF/RF64 chunks of a .wav file.
+    """
+    riff = f.read(12)
+    if len(riff) < 12 or riff[0:4] not in (b'RIFF', b'RF64') or riff[8:12] != b'WAVE':
+        return None
+
+    d = {'format': 'wav'}
+    ds64_data_size = None
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+        chunk_id = chunk_header[0:4]
+        chunk_size = struct.unpack('<I', chunk_header[4:8])[0]
+        chunk_start = f.tell()
+
+        if chunk_id == b'ds64':
+            ds64_data_size = struct.unpack('<Q', f.read(16)[8:16])[0]
+        elif chunk_id == b'fmt ':
+            fmt = f.read(chunk_size)
+            audio_format, num_channels, sampling_rate, _, block_align, bits_per_sample = \
+                struct.unpack('<HHIIHH', fmt[:16])
+            # WAVE_FORMAT_EXTENSIBLE stores the actual format in the first two bytes of the sub-format GUID
+            if audio_format == 0xFFFE and len(fmt) >= 26:
+                audio_format = struct.unpack('<H', fmt[24:26])[0]
+            d.update({'audio_format': audio_format, 'num_channels': num_channels, 'sampling_rate': sampling_rate,
+                      'block_align': block_align, 'bits_per_sample': bits_per_sample})
+        elif chunk_id == b'data':
+            data_size = chunk_size
+            if chunk_size == 0xFFFFFFFF and ds64_data_size is not None:
+                data_size = ds64_data_size
+            # the data chunk of streamed files may report a wrong size, never read behind the end of the file
+            data_size = min(data_size, file_size - chunk_start)
+            d['data_offset'] = chunk_start
+            d['data_size'] = data_size
+            if 'block_align' in d:
+                break
+            f.seek(chunk_start + data_size + (data_size % 2))
+            continue
+
+        # chunks are word aligned
+        f.seek(chunk_start + chunk_size + (chunk_size % 2))
+
+    if 'data_offset' not in d or not d.get('block_align') or not d.get('sampling_rate'):
+        return None
+    d['num_frames'] = d['data_size'] // d['block_align']
+    return d
+
+
+def _probe_flac(f, file_size):
+    """
+    Parse the STREAMINFO block of a .flac file.
+    """
+    header = f.read(4)
+    if header[:3] == b'ID3':
+        f.seek(_id3v2_size(header + f.read(6)))
+        header = f.read(4)
+    if header != b'fLaC':
+        return None
+
+    block_header = f.read(4)
+    if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+        return None
+    info = f.read(34)
+    if len(info) < 34:
+        return None
+
+    bits = int.from_bytes(info[10:18], 'big')
+    sampling_rate = bits >> 44
+    num_channels = ((bits >> 41) & 0x7) + 1
+    bits_per_sample = ((bits >> 36) & 0x1F) + 1
+    num_frames = bits & 0xFFFFFFFFF
+    if sampling_rate == 0 or num_frames == 0:
+        return None
+    return {'format': 'flac', 'sampling_rate': sampling_rate, 'num_channels': num_channels,
+            'bits_per_sample': bits_per_sample, 'num_frames': num_frames}
+
+
+def _probe_mp3(f, file_size):
+    """
+    Parse the first MPEG audio frame (and its Xing/Info or VBRI header if present) of an .mp3 file.
+    """
+    head = f.read(10)
+    audio_start = _id3v2_size(head) if head[:3] == b'ID3' else 0
+    f.seek(audio_start)
+    buffer = f.read(_HEADER_SCAN_SIZE)
+
+    # ID3v1 tag at the end of the file
+    audio_end = file_size
+    if file_size >= 128:
+        f.seek(file_size - 128)
+        if f.read(3) == b'TAG':
+            audio_end -= 128
+
+    pos = _find_mpeg_frame(buffer)
+    if pos is None:
+        return None
+    frame = _parse_mpeg_header(buffer[pos:pos + 4])
+    frame_data = buffer[pos:pos + frame['frame_length']]
+
+    # Xing/Info header (VBR and LAME encoded CBR files)
+    if frame['version'] == 1:
+        xing_offset = 4 + (17 if frame['num_channels'] == 1 else 32)
+    else:
+        xing_offset = 4 + (9 if frame['num_channels'] == 1 else 17)
+    num_mpeg_frames = None
+    # encoder delay and padding (in samples) that decoders drop at the beginning and end of the stream
+    delay, padding = 0, 0
+    tag = frame_data[xing_offset:xing_offset + 4]
+    if tag in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', frame_data[xing_offset + 4:xing_offset + 8])[0]
+        if flags & 0x1:
+            num_mpeg_frames = struct.unpack('>I', frame_data[xing_offset + 8:xing_offset + 12])[0]
+        # the optional fields (frames, bytes, table of contents, quality) are followed by the LAME tag
+        lame_offset = xing_offset + 8 + 4 * bool(flags & 0x1) + 4 * bool(flags & 0x2) + 100 * bool(flags & 0x4) + \
+            4 * bool(flags & 0x8)
+        delay, padding = _parse_lame_delay_padding(frame_data[lame_offset:lame_offset + 24])
+    elif frame_data[36:40] == b'VBRI':
+        num_mpeg_frames = struct.unpack('>I', frame_data[50:54])[0]
+
+    if num_mpeg_frames:
+        num_frames = max(num_mpeg_frames * frame['samples_per_frame'] - delay - padding, 0)
+    else:
+        # constant bitrate: estimate the length from the size of the audio stream
+        audio_bytes = audio_end - audio_start - pos
+        num_frames = int(audio_bytes * 8 / (frame['bitrate'] * 1000) * frame['sampling_rate'])
+
+    return {'format': 'mp3', 'sampling_rate': frame['sampling_rate'], 'num_channels': frame['num_channels'],
+            'bitrate': frame['bitrate'], 'num_frames': num_frames}
+
+
+def _parse_lame_delay_padding(lame_tag):
+    """
+    Return the encoder delay and padding (in samples) stored in a LAME tag, or (0, 0) if there is no LAME tag.
+    """
+    if len(lame_tag) < 24 or lame_tag[:4] not in (b'LAME', b'Lavc', b'Lavf'):
+        return 0, 0
+    # 12 bit delay followed by 12 bit padding, starting at byte 21 of the tag
+    delay = (lame_tag[21] << 4) | (lame_tag[22] >> 4)
+    padding = ((lame_tag[22] & 0x0F) << 8) | lame_tag[23]
+    return delay, padding
+
+
+def _id3v2_size(header):
+    """
+    Return the total size of an ID3v2 tag (syncsafe integer plus 10 bytes header).
+    """
+    size = 0
+    for byte in header[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if header[5] & 0x10 else 0
+    return size + 10 + footer
+
+
+def _parse_mpeg_header(header):
+    """
+    Parse a 4 byte MPEG audio frame header. Returns None if the header is not valid.
+    """
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = _MPEG_VERSIONS.get((header[1] >> 3) & 0x3)
+    layer = _MPEG_LAYERS.get((header[1] >> 1) & 0x3)
+    bitrate_index = header[2] >> 4
+    sampling_rate_index = (header[2] >> 2) & 0x3
+    if version is None or layer is None or bitrate_index in (0, 15) or sampling_rate_index == 3:
+        return None
+
+    bitrate = _MPEG_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    sampling_rate = _MPEG_SAMPLING_RATES[version][sampling_rate_index]
+    padding = (header[2] >> 1) & 0x1
+    num_channels = 1 if (header[3] >> 6) == 3 else 2
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate * 1000 // sampling_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if (layer == 2 or version == 1) else 576
+        frame_length = samples_per_frame // 8 * bitrate * 1000 // sampling_rate + padding
+
+    return {'version': version, 'layer': layer, 'bitrate': bitrate, 'sampling_rate': sampling_rate,
+            'num_channels': num_channels, 'samples_per_frame': samples_per_frame, 'frame_length': frame_length}
+
+
+def _find_mpeg_frame(buffer):
+    """
+    Find the first MPEG frame sync that is followed by a second valid frame header.
+    """
+    pos = buffer.find(b'\xff')
+    while 0 <= pos < len(buffer) - 4:
+        frame = _parse_mpeg_header(buffer[pos:pos + 4])
+        if frame is not None:
+            next_pos = pos + frame['frame_length']
+            if next_pos + 4 > len(buffer) or _parse_mpeg_header(buffer[next_pos:next_pos + 4]) is not None:
+                return pos
+        pos = buffer.find(b'\xff', pos + 1)
+    return None
+
+
+def _probe_audio_fallback(path):
+    """
+    Get the metadata through soundfile (header only) or, if the format is not supported, through a full decode.
+    """
+    try:
+        import soundfile as sf
+        info = sf.info(path)
+        return {'format': info.format.lower(), 'sampling_rate': info.samplerate, 'num_channels': info.channels,
+                'num_frames': info.frames, 'duration': info.frames / info.samplerate}
+    except Exception:
+        pass
+
+    import librosa
+    data, sampling_rate = librosa.load(path, sr=None, mono=False)
+    data = np.transpose(data)
+    num_channels = data.shape[1] if data.ndim == 2 else 1
+    return {'format': os.path.splitext(path)[1].lower().lstrip('.'), 'sampling_rate': sampling_rate,
+            'num_channels': num_channels, 'num_frames': len(data), 'duration': len(data) / sampling_rate}
+
+
+def _probe_csv(path):
+    """
+    Read the header of a .csv file and count its rows by streaming through the file.
+    """
+    dialect = sniff_csv(path)
+
+    num_lines = 0
+    last_byte = b'\n'
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            num_lines += chunk.count(b'\n')
+            last_byte = chunk[-1:]
+    if last_byte != b'\n':
+        num_lines += 1
+
+    return {'format': 'csv', 'columns': dialect['columns'], 'num_columns': len(dialect['columns']),
+            'num_rows': max(num_lines - 1, 0), 'delimiter': dialect['delimiter']}
@@ -3,21 +3,21 @@ import pyqtgraph as pg
 
 class RegionItem(pg.LinearRegionItem):
     """
-    A custom LinearRegionItem that is aware of the table it is being used in.
+    A custom LinearRegionItem that is aware of the annotated event it belongs to.
     """
-    def __init__(self):
+    def __init__(self, event_id=None):
         """
         Initialize the RegionItem.
         """
         super(RegionItem, self).__init__()
-        self.table_data = None
+        self.event_id = event_id
+        self.annotations = None
         self.table_widget = None
 
     def mouseClickEvent(self, ev):
         """
-        Override the mouseClickEvent to select the corresponding row in the table.
+        Override the mouseClickEvent to select the corresponding row in the table. Where events overlap, the
+        shortest event under the mouse is selected.
         """
-        for index, row in self.table_data.iterrows():
-            for region in row['Regions']:
-                if region == self:
-                    self.table_widget.select_row(index)
\ No newline at end of file
+        event_id = self.annotations.event_at(ev.pos().x())
+        self.table_widget.select_row(self.annotations.row_of(event_id if event_id is not None else self.event_id))
@@ -0,0 +1,295 @@
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+CHANNEL_OPTIONS = ["Single channel", "Left channel", "Right channel", "Average of channels"]
+
+
+def get_channel_options(num_channels):
+    """
+    Return the channel options that can be selected for a signal with num_channels channels. "Single channel" shows
+    the first channel of files with more than two channels.
+    """
+    if num_channels == 2:
+        return ["Left channel", "Right channel", "Average of channels"]
+    elif num_channels > 2:
+        return ["Single channel", "Average of channels"]
+    return ["Single channel"]
+
+
+class SampleSource:
+    """
+    Base class that gives lazy access to the samples of a signal.
+
+    All channels of the file are kept and the selected channel option (see CHANNEL_OPTIONS) is applied when samples
+    are read. Slicing a source (e.g. source[start:stop] or source[start:stop, ...]) returns a float32 array that only
+    contains the requested range, so the full signal never has to be held in memory.
+    """
+    dtype = np.dtype(np.float32)
+    ndim = 1
+    # reading a few samples that are far apart is cheap (e.g. a preview of the whole signal)
+    cheap_strided_reads = True
+
+    def __init__(self, num_frames, num_channels, sampling_rate=None, channel="Single channel"):
+        self._check_channel(channel, num_channels)
+        self.num_frames = int(num_frames)
+        self.num_channels = int(num_channels)
+        self.sampling_rate = sampling_rate
+        self.channel = channel
+
+    @staticmethod
+    def _check_channel(channel, num_channels):
+        if channel not in CHANNEL_OPTIONS:
+            raise RuntimeError(f"Option {channel} was not defined.")
+        if channel in ("Left channel", "Right channel") and num_channels < 2:
+            raise RuntimeError(f"Option {channel} is not available for a signal with a single channel.")
+
+    def __len__(self):
+        return self.num_frames
+
+    def with_channel(self, channel):
+        """
+        Return a view of the same signal with another channel option.
+
+        The view shares the memory map, decoded samples or decoded blocks with this source, so switching channels
+        doesn't read or decode the file again.
+        """
+        self._check_channel(channel, self.num_channels)
+        view = copy.copy(self)
+        view.channel = channel
+        return view
+
+    @property
+    def shape(self):
+        return (self.num_frames,)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            if len(key) == 0 or any(k is not Ellipsis for k in key[1:]):
+                raise IndexError("Only the time axis of a sample source can be indexed.")
+            key = key[0]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.num_frames)
+            if step < 0:
+                return self.read(0, self.num_frames)[key]
+            return self.read(start, stop, step)
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self.num_frames
+            if not 0 <= key < self.num_frames:
+                raise IndexError(f"Index {key} is out of bounds for a signal with {self.num_frames} samples.")
+            return self.read(key, key + 1)[0]
+        return self.read(0, self.num_frames)[key]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.read(0, self.num_frames)
+        return data if dtype is None else data.astype(dtype)
+
+    def __deepcopy__(self, memo):
+        # sources are read-only views on a file, copying the samples would defeat their purpose
+        return self
+
+    def close(self):
+        """
+        Release the file handle of the source and its channel views. Sources without own file handle don't do
+        anything.
+        """
+
+    def read(self, start, stop, step=1):
+        """
+        Return the samples in [start, stop) of the selected channel option as array of type self.dtype.
+        """
+        start = max(0, int(start))
+        stop = min(self.num_frames, int(stop))
+        if stop <= start:
+            return np.zeros(0, dtype=self.dtype)
+        frames = self._read_frames(start, stop, step)
+        return self._select_channel(frames)
+
+    def iter_chunks(self, chunk_size=2 ** 20):
+        """
+        Iterate over the whole signal in chunks. Yields tuples of (start index, samples).
+        """
+        for start in range(0, self.num_frames, chunk_size):
+            yield start, self.read(start, start + chunk_size)
+
+    def _read_frames(self, start, stop, step):
+        """
+        Return the frames in [start, stop) with all channels as array of shape (frames, channels).
+        """
+        raise NotImplementedError
+
+    def _select_channel(self, frames):
+        """
+        Apply the channel option to an array of shape (frames, channels).
+        """
+        if self.channel == "Average of channels":
+            return frames.mean(axis=1, dtype=self.dtype)
+        elif self.channel == "Right channel":
+            return np.ascontiguousarray(frames[:, 1])
+        return np.ascontiguousarray(frames[:, 0])
+
+
+class ArraySource(SampleSource):
+    """
+    Sample source for signals that are already decoded into memory (e.g. .csv columns or audio files that can't be
+    decoded in blocks).
+
+    Floating point arrays keep their dtype, all other arrays are read as float64.
+    """
+    def __init__(self, data, sampling_rate=None, channel="Single channel"):
+        data = np.asarray(data)
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+        super().__init__(data.shape[0], data.shape[1], sampling_rate, channel)
+        self._data = data
+        self.dtype = data.dtype if np.issubdtype(data.dtype, np.floating) else np.dtype(np.float64)
+
+    def _read_frames(self, start, stop, step):
+        return np.asarray(self._data[start:stop:step], dtype=self.dtype)
+
+    def _select_channel(self, frames):
+        if self.num_channels == 1 and self.channel == "Single channel":
+            # one channel arrays don't need to be copied again
+            return frames[:, 0]
+        return super()._select_channel(frames)
+
+
+class MemmapWavSource(SampleSource):
+    """
+    Sample source for uncompressed .wav files.
+
+    The samples are memory-mapped in the native dtype of the file and only scaled to float32 when they are read.
+    """
+    # (audio format, bits per sample) -> (numpy dtype, offset, scale), audio format 1 is PCM and 3 is IEEE float
+    _FORMATS = {
+        (1, 8): ('u1', 128, 1 / 128),
+        (1, 16): ('<i2', 0, 1 / 2 ** 15),
+        (1, 24): ('u1', 0, 1 / 2 ** 31),
+        (1, 32): ('<i4', 0, 1 / 2 ** 31),
+        (3, 32): ('<f4', 0, 1),
+        (3, 64): ('<f8', 0, 1),
+    }
+
+    def __init__(self, path, metadata, channel="Single channel"):
+        super().__init__(metadata['num_frames'], metadata['num_channels'], metadata['sampling_rate'], channel)
+        self.path = path
+        self._bits_per_sample = metadata['bits_per_sample']
+        dtype, self._offset, self._scale = self._FORMATS[(metadata['audio_format'], self._bits_per_sample)]
+
+        if self._bits_per_sample == 24:
+            shape = (self.num_frames, self.num_channels, 3)
+        else:
+            shape = (self.num_frames, self.num_channels)
+        self._memmap = np.memmap(path, dtype=dtype, mode='r', offset=metadata['data_offset'], shape=shape)
+
+    @classmethod
+    def is_supported(cls, metadata):
+        """
+        Check if the probed metadata describes a .wav file that can be memory-mapped.
+        """
+        return metadata.get('format') == 'wav' and \
+            (metadata.get('audio_format'), metadata.get('bits_per_sample')) in cls._FORMATS and \
+            metadata['block_align'] == metadata['num_channels'] * metadata['bits_per_sample'] // 8
+
+    def _read_frames(self, start, stop, step):
+        raw = self._memmap[start:stop:step]
+        if self._bits_per_sample == 24:
+            # assemble the little-endian 24 bit samples in the upper bytes of an int32
+            raw = (raw[..., 0].astype(np.int32) << 8) | (raw[..., 1].astype(np.int32) << 16) | \
+                  (raw[..., 2].astype(np.int8).astype(np.int32) << 24)
+        frames = raw.astype(np.float32)
+        if self._offset:
+            frames -= self._offset
+        if self._scale != 1:
+            frames *= self._scale
+        return frames
+
+
+class _SharedSoundFile:
+    """
+    soundfile handle that is shared by a BlockDecodedSource and its channel views.
+
+    The file is closed by close() or when the last source using it is garbage collected.
+    """
+    def __init__(self, path):
+        import soundfile as sf
+        self.file = sf.SoundFile(path)
+        # soundfile handles can't be used from several threads at once (plots, pyramids and tiles read in parallel)
+        self.lock = threading.Lock()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def __del__(self):
+        # the handle doesn't exist if opening the file failed
+        if hasattr(self, 'file'):
+            self.close()
+
+
+class BlockDecodedSource(SampleSource):
+    """
+    Sample source for compressed audio files (e.g. .mp3 or .flac) that soundfile can seek in.
+
+    Only the blocks of BLOCK_FRAMES frames that cover a requested range are decoded. The most recently used blocks
+    are cached, so neighbouring reads (e.g. redrawing a plot or exporting an event) don't decode them again.
+    """
+    BLOCK_FRAMES = 2 ** 16
+    MAX_BLOCKS = 64
+    # strided reads decode every block of the range
+    cheap_strided_reads = False
+
+    def __init__(self, path, channel="Single channel"):
+        self.path = path
+        self._handle = _SharedSoundFile(path)
+        sound_file = self._handle.file
+        super().__init__(sound_file.frames, sound_file.channels, sound_file.samplerate, channel)
+        self._blocks = OrderedDict()
+
+    def close(self):
+        """
+        Close the file of this source and all of its channel views. Blocks that are not cached can't be read anymore.
+        """
+        self._handle.close()
+
+    @classmethod
+    def is_supported(cls, path):
+        """
+        Check if soundfile can open and seek in a file.
+        """
+        try:
+            import soundfile as sf
+            with sf.SoundFile(path) as f:
+                return f.seekable() and f.frames > 0
+        except Exception:
+            return False
+
+    def _read_frames(self, start, stop, step):
+        first_block = start // self.BLOCK_FRAMES
+        last_block = (stop - 1) // self.BLOCK_FRAMES
+        with self._handle.lock:
+            blocks = [self._get_block(idx) for idx in range(first_block, last_block + 1)]
+        frames = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+        offset = first_block * self.BLOCK_FRAMES
+        return frames[start - offset:stop - offset:step]
+
+    def _get_block(self, idx):
+        block = self._blocks.get(idx)
+        if block is not None:
+            self._blocks.move_to_end(idx)
+            return block
+
+        start = idx * self.BLOCK_FRAMES
+        sound_file = self._handle.file
+        if sound_file.tell() != start:
+            sound_file.seek(start)
+        block = sound_file.read(min(self.BLOCK_FRAMES, self.num_frames - start), dtype='float32', always_2d=True)
+        self._blocks[idx] = block
+        if len(self._blocks) > self.MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        return block
@@ -0,0 +1,117 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt6 import QtCore
+
+from .waveform_pyramid import WaveformPyramid, min_max_per_block
+
+
+class SignalCurve(pg.PlotCurveItem):
+    """
+    A PlotCurveItem that only reads the samples inside the visible x-range from its sample source.
+
+    If more samples than pixels are visible, the samples are reduced to the minimum and maximum of each pixel column
+    so that peaks stay visible. Once the WaveformPyramid of the signal was built in the background, the
+    minima/maxima are taken from the pyramid level matching the pixel width, so the cost of a redraw depends on the
+    width of the plot and not on the length of the recording. Until the pyramid is ready, only a strided subsample of
+    the visible range is drawn when zoomed out (nothing for sources that would have to decode the whole range for
+    it).
+    """
+    pyramid_ready = QtCore.pyqtSignal(object)
+    # emitted in the GUI thread once a pyramid that was built in the background is used
+    pyramid_changed = QtCore.pyqtSignal(object)
+
+    def __init__(self, t, data, pyramid=None, cache_key=None, **kwargs):
+        """
+        :param t: TimeBase of the signal
+        :param data: SampleSource or array with the samples
+        :param pyramid: WaveformPyramid of the signal, it is built in the background if None
+        :param cache_key: key under which a newly built pyramid is stored in the on-disk cache
+        """
+        super().__init__(**kwargs)
+        self.t = t
+        self.data = data
+        self.pyramid = pyramid
+        self.cache_key = cache_key
+        self._plot = None
+        self._view_box = None
+        self._cancel_pyramid = None
+        self.pyramid_ready.connect(self._set_pyramid)
+
+    def attach(self, plot):
+        """
+        Add the curve to a PlotItem and update it whenever the visible x-range or the size of the plot changes.
+        """
+        plot.addItem(self)
+        self._plot = plot
+        self._view_box = plot.getViewBox()
+        self._view_box.sigXRangeChanged.connect(self.update_visible_range)
+        self._view_box.sigResized.connect(self.update_visible_range)
+        if self.pyramid is None:
+            # the callback runs in the worker thread, the signal moves the pyramid to the GUI thread
+            self._cancel_pyramid = WaveformPyramid.build_async(self.data, self.pyramid_ready.emit, self.cache_key)
+        self.update_visible_range()
+
+    def detach(self):
+        """
+        Remove the curve from its plot and stop building its pyramid.
+        """
+        if self._cancel_pyramid is not None:
+            self._cancel_pyramid.set()
+        if self._plot is not None:
+            self._view_box.sigXRangeChanged.disconnect(self.update_visible_range)
+            self._view_box.sigResized.disconnect(self.update_visible_range)
+            self._plot.removeItem(self)
+            self._plot = self._view_box = None
+
+    def _set_pyramid(self, pyramid):
+        self.pyramid = pyramid
+        self.update_visible_range()
+        self.pyramid_changed.emit(pyramid)
+
+    def update_visible_range(self):
+        """
+        Reload the samples of the visible x-range.
+        """
+        num_samples = min(len(self.t), len(self.data))
+        if self._view_box is None or num_samples == 0:
+            return
+        x_min, x_max = self._view_box.viewRange()[0]
+        start = max(self.t.time_to_index(x_min, side='right') - 1, 0)
+        stop = min(self.t.time_to_index(x_max, side='left') + 1, num_samples)
+        num_pixels = max(int(self._view_box.width()), 1)
+
+        if stop - start <= 2 * num_pixels:
+            self.setData(self.t[start:stop], self.data[start:stop])
+            return
+
+        samples_per_pixel = int(np.ceil((stop - start) / num_pixels))
+        level = self.pyramid.select_level(samples_per_pixel) if self.pyramid is not None else None
+        if level is not None:
+            first_sample, mins, maxs = self.pyramid.get_range(level, start, stop)
+            block_size = level['block_size']
+        elif self.pyramid is None and samples_per_pixel > WaveformPyramid.BASE_BLOCK_SIZE:
+            self._draw_preview(start, stop, num_pixels)
+            return
+        else:
+            # zoomed in as far as the finest level of the pyramid (or further): reduce the visible samples directly,
+            # these are at most BASE_BLOCK_SIZE samples per pixel
+            first_sample, block_size = start, samples_per_pixel
+            mins, maxs = min_max_per_block(self.data, start, stop, samples_per_pixel)
+
+        y = np.empty(2 * len(mins), dtype=mins.dtype)
+        y[0::2] = mins
+        y[1::2] = maxs
+        x = self.t[first_sample:min(first_sample + len(mins) * block_size, num_samples):block_size]
+        x = np.repeat(x, 2)
+        self.setData(x, y[:len(x)])
+
+    def _draw_preview(self, start, stop, num_pixels):
+        """
+        Draw about two samples per pixel of the samples [start, stop) while the pyramid is built, so a redraw never
+        reads all visible samples. The curve is redrawn from the pyramid once it is ready.
+        """
+        if not getattr(self.data, 'cheap_strided_reads', True):
+            self.setData([], [])
+            return
+        step = int(np.ceil((stop - start) / (2 * num_pixels)))
+        self.setData(self.t[start:stop:step], self.data[start:stop:step])
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+PERCENTILES = (0.5, 1, 5, 50, 95, 99, 99.5)
+# Percentiles are computed from an evenly strided subsample of at most this many samples
+MAX_PERCENTILE_SAMPLES = 2 ** 20
+
+
+class SignalStatsAccumulator:
+    """
+    Collects the statistics of a signal (see compute_signal_stats) from its chunks, so they can be computed in a
+    pass over the signal that reads every sample anyway (e.g. building its waveform pyramid).
+    """
+    def __init__(self, num_samples):
+        self.num_samples = num_samples
+        self._stride = max(num_samples // MAX_PERCENTILE_SAMPLES, 1)
+        self._count = 0
+        self._minimum, self._maximum = np.inf, -np.inf
+        self._total, self._total_squares = 0.0, 0.0
+        self._subsample = []
+
+    def add(self, start, chunk):
+        """
+        Add the samples of a chunk that starts at the sample index start.
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if len(chunk) == 0:
+            return
+        self._count += len(chunk)
+        self._minimum = min(self._minimum, float(chunk.min()))
+        self._maximum = max(self._maximum, float(chunk.max()))
+        self._total += float(chunk.sum())
+        self._total_squares += float(np.dot(chunk, chunk))
+        # the subsample is aligned to the global sample index, so it doesn't depend on the chunk size
+        self._subsample.append(chunk[(-start) % self._stride::self._stride])
+
+    def result(self):
+        """
+        Return the statistics of all chunks that were added.
+        """
+        if self._count == 0:
+            return {'count': 0, 'min': 0.0, 'max': 0.0, 'abs_max': 0.0, 'mean': 0.0, 'rms': 0.0,
+                    'percentiles': {f"{p:g}": 0.0 for p in PERCENTILES}}
+        percentiles = np.percentile(np.concatenate(self._subsample), PERCENTILES)
+        return {'count': self._count, 'min': self._minimum, 'max': self._maximum,
+                'abs_max': max(abs(self._minimum), abs(self._maximum)), 'mean': self._total / self._count,
+                'rms': float(np.sqrt(self._total_squares / self._count)),
+                'percentiles': {f"{p:g}": float(value) for p, value in zip(PERCENTILES, percentiles)}}
+
+
+def compute_signal_stats(data, progress_callback=None, chunk_size=2 ** 20):
+    """
+    Return a dictionary with count, min, max, abs_max, mean, rms and percentiles of a signal (SampleSource or
+    array), computed in one vectorized pass over its chunks.
+
+    The percentiles are a dictionary with the percentile as string (e.g. '99.5') and are estimated from an evenly
+    strided subsample, so they stay cheap for long signals. If given, progress_callback is called with the fraction
+    of the signal that was processed so far.
+    """
+    num_samples = len(data)
+    accumulator = SignalStatsAccumulator(num_samples)
+    for start in range(0, num_samples, chunk_size):
+        accumulator.add(start, data[start:min(start + chunk_size, num_samples)])
+        if progress_callback is not None:
+            progress_callback(min(start + chunk_size, num_samples) / num_samples)
+    return accumulator.result()
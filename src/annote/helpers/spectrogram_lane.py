@@ -0,0 +1,147 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt6 import QtCore
+
+from .spectrogram_tiles import TILE_COLUMNS, get_tile_async, hop_size, num_columns, select_level
+
+
+class SpectrogramLane(pg.ItemGroup):
+    """
+    Spectrogram of an audio signal that is drawn from tiles of STFT frames.
+
+    Only the tiles of the visible time range are requested, at the level (hop size) matching the zoom. Tiles are
+    computed in a thread pool and kept in an LRU cache, the neighbouring tiles are prefetched so panning stays
+    smooth on long recordings. Tiles of the previous level stay visible until the new tiles are ready.
+    """
+    tile_ready = QtCore.pyqtSignal(int, int, object)
+    # Range of the color map in dB below the loudest value seen so far
+    DYNAMIC_RANGE = 80
+
+    def __init__(self, t, data, sampling_rate, cache_key=None):
+        """
+        :param t: TimeBase of the signal
+        :param data: SampleSource or array with the samples
+        :param sampling_rate: sampling rate of the signal
+        :param cache_key: key identifying the signal in the tile cache (e.g. the key of its waveform pyramid)
+        """
+        super().__init__()
+        self.t = t
+        self.data = data
+        self.sampling_rate = sampling_rate
+        self.source_key = cache_key if cache_key is not None else id(data)
+        self._plot = None
+        self._view_box = None
+        self._level = None
+        self._wanted = set()
+        self._images = {}
+        self._pending = {}
+        self._max_db = None
+        self._lut = pg.colormap.get('viridis').getLookupTable(nPts=256)
+        self.tile_ready.connect(self._tile_ready)
+
+    def attach(self, plot):
+        """
+        Add the lane to a PlotItem and update it whenever the visible x-range or the size of the plot changes.
+        """
+        plot.addItem(self)
+        plot.setYRange(0, self.sampling_rate / 2, padding=0)
+        self._plot = plot
+        self._view_box = plot.getViewBox()
+        self._view_box.sigXRangeChanged.connect(self.update_visible_range)
+        self._view_box.sigResized.connect(self.update_visible_range)
+        self.update_visible_range()
+
+    def detach(self):
+        """
+        Remove the lane from its plot and drop the tile requests that were not started yet.
+        """
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._wanted = set()
+        if self._plot is not None:
+            self._view_box.sigXRangeChanged.disconnect(self.update_visible_range)
+            self._view_box.sigResized.disconnect(self.update_visible_range)
+            self._plot.removeItem(self)
+            self._plot = self._view_box = None
+
+    def update_visible_range(self):
+        """
+        Show the cached tiles of the visible range and request the missing ones.
+        """
+        num_samples = len(self.data)
+        if self._view_box is None or num_samples == 0:
+            return
+        x_min, x_max = self._view_box.viewRange()[0]
+        start = max(int((x_min - self.t.start) * self.sampling_rate), 0)
+        stop = min(int(np.ceil((x_max - self.t.start) * self.sampling_rate)), num_samples)
+        if stop <= start:
+            return
+        num_pixels = max(int(self._view_box.width()), 1)
+
+        level = select_level((stop - start) / num_pixels)
+        if level != self._level:
+            for image in self._images.values():
+                image.setZValue(-1)
+            self._level = level
+        last_tile = (num_columns(num_samples, level) - 1) // TILE_COLUMNS
+        first_visible = (start // hop_size(level)) // TILE_COLUMNS
+        last_visible = min((stop // hop_size(level)) // TILE_COLUMNS, last_tile)
+        self._wanted = {(level, idx) for idx in range(first_visible, last_visible + 1)}
+        prefetch = {(level, idx) for idx in (first_visible - 1, last_visible + 1) if 0 <= idx <= last_tile}
+
+        # requests that were neither shown nor started yet are dropped when the user zoomed or panned away
+        for key, future in list(self._pending.items()):
+            if key not in self._wanted and key not in prefetch and future.cancel():
+                del self._pending[key]
+
+        for key in sorted(self._wanted) + sorted(prefetch):
+            if key in self._images or key in self._pending:
+                continue
+            # the callback runs in the worker thread, the signal moves the tile to the GUI thread
+            tile, future = get_tile_async(self.data, self.source_key, *key, self.tile_ready.emit)
+            if tile is None:
+                self._pending[key] = future
+            elif key in self._wanted:
+                self._show_tile(key, tile)
+        self._remove_stale_tiles()
+
+    def _tile_ready(self, level, tile_index, tile):
+        key = (level, tile_index)
+        self._pending.pop(key, None)
+        if key in self._wanted and key not in self._images:
+            self._show_tile(key, tile)
+            self._remove_stale_tiles()
+
+    def _show_tile(self, key, tile):
+        if tile.shape[0] == 0:
+            return
+        level, tile_index = key
+        hop = hop_size(level)
+        image = pg.ImageItem(tile, autoLevels=False)
+        image.setLookupTable(self._lut)
+        x = self.t.start + (tile_index * TILE_COLUMNS * hop - hop / 2) / self.sampling_rate
+        image.setRect(QtCore.QRectF(x, 0, tile.shape[0] * hop / self.sampling_rate, self.sampling_rate / 2))
+        self.addItem(image)
+        self._images[key] = image
+
+        tile_max = float(np.max(tile))
+        if self._max_db is None or tile_max > self._max_db:
+            self._max_db = tile_max
+            for other in self._images.values():
+                other.setLevels((self._max_db - self.DYNAMIC_RANGE, self._max_db))
+        else:
+            image.setLevels((self._max_db - self.DYNAMIC_RANGE, self._max_db))
+
+    def _remove_stale_tiles(self):
+        """
+        Remove the tiles that are not visible anymore once all visible tiles are shown.
+        """
+        if not all(key in self._images for key in self._wanted):
+            return
+        for key in list(self._images):
+            if key not in self._wanted:
+                image = self._images.pop(key)
+                image.setParentItem(None)
+                if image.scene() is not None:
+                    image.scene().removeItem(image)
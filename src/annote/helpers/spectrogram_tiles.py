@@ -0,0 +1,134 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.signal import get_window
+
+
+# Tiles are computed in the background, the pool is shared by all spectrogram lanes
+_executor = ThreadPoolExecutor(max_workers=max(min((os.cpu_count() or 2) - 1, 4), 1),
+                               thread_name_prefix="annote-spectrogram")
+
+N_FFT = 1024
+# Hop size of level 0, every following level doubles the hop size
+BASE_HOP = 256
+# Number of STFT frames (time columns) of a tile
+TILE_COLUMNS = 512
+
+
+class SpectrogramTileCache:
+    """
+    Thread-safe LRU cache for spectrogram tiles that is bounded by the number of bytes of the cached tiles.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            tile = self._entries.get(key)
+            if tile is not None:
+                self._entries.move_to_end(key)
+            return tile
+
+    def put(self, key, tile):
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key).nbytes
+            self._entries[key] = tile
+            self.current_bytes += tile.nbytes
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+tile_cache = SpectrogramTileCache(int(os.environ.get("ANNOTE_SPECTROGRAM_CACHE_BYTES", 512 * 1024 ** 2)))
+
+
+def hop_size(level):
+    return BASE_HOP * 2 ** level
+
+
+def select_level(samples_per_pixel):
+    """
+    Return the coarsest level whose hop size is not larger than the number of samples per pixel.
+    """
+    if samples_per_pixel <= BASE_HOP:
+        return 0
+    return int(np.floor(np.log2(samples_per_pixel / BASE_HOP)))
+
+
+def num_columns(num_samples, level):
+    """
+    Return the number of STFT frames of a signal at a level.
+    """
+    return int(np.ceil(num_samples / hop_size(level)))
+
+
+def compute_tile(data, level, tile_index, n_fft=N_FFT):
+    """
+    Compute the magnitude spectrogram (in dB, shape (columns, n_fft // 2 + 1)) of one tile of a signal.
+
+    Frame c of a level is centered at sample c * hop. If the hop size is not larger than the window, the samples of
+    the tile are read at once and framed with a strided view, otherwise only the samples of every frame are read.
+    All frames of the tile are transformed with a single vectorized FFT.
+    """
+    hop = hop_size(level)
+    num_samples = len(data)
+    first_column = tile_index * TILE_COLUMNS
+    columns = min(TILE_COLUMNS, num_columns(num_samples, level) - first_column)
+    if columns <= 0:
+        return np.zeros((0, n_fft // 2 + 1), dtype=np.float32)
+    frame_starts = (first_column + np.arange(columns)) * hop - n_fft // 2
+
+    if hop <= n_fft:
+        start = int(frame_starts[0])
+        samples = _read_padded(data, start, int(frame_starts[-1]) + n_fft)
+        frames = np.lib.stride_tricks.sliding_window_view(samples, n_fft)[::hop]
+    else:
+        frames = np.stack([_read_padded(data, int(frame_start), int(frame_start) + n_fft)
+                           for frame_start in frame_starts])
+
+    window = get_window('hann', n_fft).astype(np.float32)
+    spectrum = np.abs(np.fft.rfft(frames * window, axis=1))
+    # scale so that a full scale sine has 0 dB
+    spectrum *= 2 / window.sum()
+    return (20 * np.log10(spectrum + 1e-10)).astype(np.float32)
+
+
+def _read_padded(data, start, stop):
+    """
+    Read the samples [start, stop) of a signal, samples outside of the signal are zero.
+    """
+    samples = np.zeros(stop - start, dtype=np.float32)
+    read_start, read_stop = max(start, 0), min(stop, len(data))
+    if read_stop > read_start:
+        samples[read_start - start:read_stop - start] = np.asarray(data[read_start:read_stop])
+    return samples
+
+
+def get_tile_async(data, source_key, level, tile_index, callback):
+    """
+    Return a cached tile or compute it in the background and call callback(level, tile_index, tile) from the
+    worker thread. Returns (tile, None) for cached tiles and (None, future) otherwise.
+    """
+    key = (source_key, level, tile_index)
+    tile = tile_cache.get(key)
+    if tile is not None:
+        return tile, None
+
+    def _compute():
+        tile = compute_tile(data, level, tile_index)
+        tile_cache.put(key, tile)
+        callback(level, tile_index, tile)
+
+    return None, _executor.submit(_compute)
@@ -0,0 +1,151 @@
+import numpy as np
+
+
+class TimeBase:
+    """
+    Base class for the time axis (x-axis) of a signal.
+
+    Indexing a time base returns the time values (in seconds) of the requested samples, so consumers can treat it
+    like the former 't' array. Time values are mapped to sample indices with time_to_index.
+    """
+    ndim = 1
+
+    def __len__(self):
+        raise NotImplementedError
+
+    @property
+    def shape(self):
+        return (len(self),)
+
+    @property
+    def start(self):
+        return float(self[0]) if len(self) > 0 else 0.0
+
+    @property
+    def end(self):
+        return float(self[len(self) - 1]) if len(self) > 0 else 0.0
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def __getitem__(self, key):
+        raise NotImplementedError
+
+    def __array__(self, dtype=None, copy=None):
+        t = self[:]
+        return t if dtype is None else t.astype(dtype)
+
+    def time_to_index(self, t, side='left'):
+        """
+        Return the index of the first sample with a time >= t (side='left') or > t (side='right'), like
+        np.searchsorted. Works for scalars and arrays.
+        """
+        raise NotImplementedError
+
+    def to_dict(self):
+        """
+        Return a small dictionary describing the time base (e.g. for saving it).
+        """
+        raise NotImplementedError
+
+
+class UniformTimeBase(TimeBase):
+    """
+    Time base of a uniformly sampled signal. Time values are computed on demand from start, sampling rate and length.
+    """
+    def __init__(self, start, sampling_rate, length):
+        self._start = float(start)
+        self.sampling_rate = sampling_rate
+        self.length = int(length)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def end(self):
+        return self._start + max(self.length - 1, 0) / self.sampling_rate
+
+    @property
+    def duration(self):
+        return self.length / self.sampling_rate
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            key = key[0]
+        if isinstance(key, slice):
+            indices = np.arange(*key.indices(self.length))
+        elif isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self.length
+            if not 0 <= key < self.length:
+                raise IndexError(f"Index {key} is out of bounds for a time axis with {self.length} samples.")
+            return self._start + key / self.sampling_rate
+        else:
+            indices = np.arange(self.length)[key]
+        return self._start + indices / self.sampling_rate
+
+    def time_to_index(self, t, side='left'):
+        # rounding avoids that floating point errors move exact sample times to the neighbouring sample
+        x = np.round((np.asarray(t, dtype=np.float64) - self._start) * self.sampling_rate, 6)
+        index = np.ceil(x) if side == 'left' else np.floor(x) + 1
+        index = np.clip(index, 0, self.length).astype(np.int64)
+        return int(index) if index.ndim == 0 else index
+
+    def to_dict(self):
+        return {'kind': 'uniform', 'start': self._start, 'sampling_rate': self.sampling_rate, 'length': self.length}
+
+
+class ExplicitTimeBase(TimeBase):
+    """
+    Time base of an irregularly sampled signal (e.g. the time column of a .csv file) that is backed by an array.
+    """
+    def __init__(self, t):
+        self._t = t
+
+    def __len__(self):
+        return len(self._t)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            key = key[0]
+        return np.asarray(self._t[key], dtype=np.float64) if not isinstance(key, (int, np.integer)) \
+            else float(self._t[key])
+
+    def time_to_index(self, t, side='left'):
+        index = np.searchsorted(self._t, t, side=side)
+        return int(index) if np.ndim(index) == 0 else index
+
+    def to_dict(self):
+        return {'kind': 'explicit', 'start': self.start, 'end': self.end, 'length': len(self)}
+
+
+class NanosecondTimeBase(TimeBase):
+    """
+    Time base backed by an int64 array with the nanoseconds since the first sample (e.g. a datetime time column of a
+    .csv file). Timestamps are stored without rounding errors, the time values in seconds are computed on demand.
+    """
+    def __init__(self, t_ns):
+        self._t_ns = t_ns
+
+    def __len__(self):
+        return len(self._t_ns)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            key = key[0]
+        return np.asarray(self._t_ns[key]) / 1e9 if not isinstance(key, (int, np.integer)) \
+            else int(self._t_ns[key]) / 1e9
+
+    def time_to_index(self, t, side='left'):
+        # time values far outside of the signal (e.g. of the view range) are clipped to about +-126 years
+        t_ns = np.round(np.clip(np.asarray(t, dtype=np.float64), -4e9, 4e9) * 1e9).astype(np.int64)
+        index = np.searchsorted(self._t_ns, t_ns, side=side)
+        return int(index) if np.ndim(index) == 0 else index
+
+    def to_dict(self):
+        return {'kind': 'nanoseconds', 'start': self.start, 'end': self.end, 'length': len(self)}
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    # guess_datetime_format is only public since pandas 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+
+# Integer value of NaT, invalid timestamps are stored with this value until they are dropped
+NAT = np.iinfo(np.int64).min
+# Number of values of the first chunk that are used to infer the format of a time column
+SAMPLE_SIZE = 1000
+# Value ranges (1973 - 2100) of numeric epoch timestamps per unit, other numeric time columns are seconds
+EPOCH_UNITS = (('s', 1e8, 4.2e9), ('ms', 1e11, 4.2e12), ('us', 1e14, 4.2e15), ('ns', 1e17, 4.2e18))
+NANOSECONDS_PER_UNIT = {'s': 10 ** 9, 'ms': 10 ** 6, 'us': 10 ** 3, 'ns': 1}
+# ISO 8601 formats without timezone that pyarrow converts with a vectorized cast instead of strptime
+ARROW_FORMATS = {f"%Y-%m-%d{sep}{time}" for sep in (' ', 'T')
+                 for time in ('%H:%M', '%H:%M:%S', '%H:%M:%S.%f')} | {'%Y-%m-%d'}
+
+
+class TimestampParser:
+    """
+    Converts chunks of a time column to int64 nanoseconds since 1970-01-01, invalid values become NAT.
+
+    The format of datetime strings is inferred once from a sample of the first chunk (see infer_timestamp_parser),
+    all chunks are then parsed in bulk with this fixed format. Numeric epoch timestamps are only scaled.
+    """
+    def __init__(self, format=None, epoch_unit=None):
+        """
+        :param format: strptime format of datetime strings (None lets pandas guess it per chunk)
+        :param epoch_unit: unit ('s', 'ms', 'us' or 'ns') of numeric epoch timestamps
+        """
+        self.format = format
+        self.epoch_unit = epoch_unit
+        self.use_arrow = pa is not None and format in ARROW_FORMATS
+
+    def parse(self, values):
+        """
+        Return the timestamps of a Series as int64 nanoseconds since 1970-01-01.
+        """
+        if self.epoch_unit is not None:
+            numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+            t = np.full(len(numbers), NAT, dtype=np.int64)
+            valid = np.isfinite(numbers)
+            t[valid] = np.round(numbers[valid] * NANOSECONDS_PER_UNIT[self.epoch_unit])
+            return t
+        if self.use_arrow:
+            try:
+                timestamps = pc.cast(pa.array(values, type=pa.string()), pa.timestamp('ns'))
+                return pc.cast(timestamps, pa.int64()).fill_null(NAT).to_numpy()
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # e.g. empty values or values that don't match the format, pandas turns them into NaT
+                pass
+        return _to_datetime(values, self.format).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def _to_datetime(values, format):
+    """
+    Parse datetime strings with a fixed format, timestamps with timezone are converted to (naive) UTC.
+    """
+    with_timezone = format is not None and ('%z' in format or '%Z' in format)
+    parsed = pd.to_datetime(values, format=format, errors='coerce', utc=with_timezone)
+    if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+        parsed = parsed.dt.tz_convert(None)
+    return parsed
+
+
+def infer_epoch_unit(values):
+    """
+    Return the unit of a numeric time column if all values are epoch timestamps of the same unit, None otherwise.
+    """
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+    numbers = numbers[np.isfinite(numbers)]
+    if len(numbers) == 0:
+        return None
+    low, high = numbers.min(), numbers.max()
+    for unit, unit_min, unit_max in EPOCH_UNITS:
+        if unit_min <= low and high <= unit_max:
+            return unit
+    return None
+
+
+def infer_datetime_format(values):
+    """
+    Return the strptime format that parses most of the sample values, or None if no format could be inferred.
+    """
+    sample = values.dropna().astype(str).str.strip()
+    sample = sample[sample != ''].head(SAMPLE_SIZE)
+    candidates = []
+    for value in sample.head(20):
+        candidate = guess_datetime_format(value)
+        if candidate is not None and candidate not in candidates:
+            candidates.append(candidate)
+
+    best_format, best_count = None, 0
+    for candidate in candidates:
+        count = int(_to_datetime(sample, candidate).notna().sum())
+        if count > best_count:
+            best_format, best_count = candidate, count
+        if count == len(sample):
+            break
+    return best_format
+
+
+def infer_timestamp_parser(values):
+    """
+    Return a TimestampParser for a time column from the values of its first chunk, or None if the column contains
+    plain numbers (seconds) instead of timestamps.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        epoch_unit = infer_epoch_unit(values.head(SAMPLE_SIZE))
+        return TimestampParser(epoch_unit=epoch_unit) if epoch_unit is not None else None
+    parser = TimestampParser(format=infer_datetime_format(values))
+    if parser.use_arrow:
+        # the vectorized cast is only used if it gives the same timestamps as the inferred format
+        sample = values.head(SAMPLE_SIZE)
+        expected = TimestampParser(format=parser.format)
+        expected.use_arrow = False
+        if not np.array_equal(parser.parse(sample), expected.parse(sample)):
+            parser.use_arrow = False
+    return parser
@@ -0,0 +1,215 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .disk_cache import DiskCache
+from .signal_stats import SignalStatsAccumulator
+
+
+# Pyramids are built in the background, at most two at a time so the GUI and loading stay responsive
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="annote-pyramid")
+# futures of the builds that didn't finish yet, keyed by their cancel event
+_pending_builds = {}
+_pending_builds_lock = threading.Lock()
+
+# On-disk cache for pyramids and signal statistics (size can be set through ANNOTE_PYRAMID_CACHE_BYTES)
+pyramid_cache = DiskCache('pyramids', max_bytes=int(os.environ.get("ANNOTE_PYRAMID_CACHE_BYTES", 2 * 1024 ** 3)))
+
+
+def pyramid_cache_key(entry, channel=None):
+    """
+    Return the key of the cached pyramid of a data dictionary (content fingerprint plus channel option or column).
+    If channel is None, the channel option of the entry is used.
+    """
+    return pyramid_cache.make_key(entry['hash'], channel or entry.get('channel'), entry.get('t_column_name'),
+                                  entry.get('data_column_name'))
+
+
+def cancel_pyramid_builds(shutdown=False):
+    """
+    Cancel all pyramid builds that didn't finish yet. Running builds stop at their next chunk.
+
+    If shutdown is True, the thread pool is shut down as well, so closing the application doesn't wait for queued
+    builds.
+    """
+    with _pending_builds_lock:
+        builds = list(_pending_builds.items())
+        _pending_builds.clear()
+    for cancel_event, future in builds:
+        cancel_event.set()
+        future.cancel()
+    if shutdown:
+        _executor.shutdown(wait=False)
+
+
+def min_max_per_block(data, start, stop, block_size, chunk_size=2 ** 20):
+    """
+    Reduce the samples in [start, stop) of a signal to the minimum and maximum of each block of block_size samples.
+
+    The samples are read in chunks, so the signal never has to be held in memory at once.
+    """
+    mins, maxs = [], []
+    chunk_size = max(chunk_size // block_size, 1) * block_size
+    for chunk_start in range(start, stop, chunk_size):
+        chunk = np.asarray(data[chunk_start:min(chunk_start + chunk_size, stop)])
+        blocks = _pad_to_blocks(chunk, block_size)
+        mins.append(blocks.min(axis=1))
+        maxs.append(blocks.max(axis=1))
+    if len(mins) == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    return np.concatenate(mins), np.concatenate(maxs)
+
+
+def _pad_to_blocks(values, block_size):
+    """
+    Reshape an array into rows of block_size values. The last row is padded with its last value.
+    """
+    num_blocks = int(np.ceil(len(values) / block_size))
+    padded = np.pad(values, (0, num_blocks * block_size - len(values)), mode='edge')
+    return padded.reshape(num_blocks, block_size)
+
+
+class WaveformPyramid:
+    """
+    Multi-resolution summary (minimum, maximum and RMS per block) of a signal used for drawing long recordings.
+
+    Level 0 summarizes blocks of BASE_BLOCK_SIZE samples and every following level combines FACTOR blocks of the
+    previous level, until a level has less than MIN_BLOCKS blocks. Drawing then only needs a few values per pixel,
+    independent of the length of the recording. The statistics of the signal (see signal_stats.compute_signal_stats)
+    are collected while the pyramid is built, so the signal only has to be read once.
+    """
+    BASE_BLOCK_SIZE = 256
+    FACTOR = 4
+    MIN_BLOCKS = 1024
+
+    def __init__(self, levels, num_samples, stats):
+        """
+        :param levels: list of dictionaries with 'block_size', 'min', 'max' and 'rms' (one value per block)
+        :param num_samples: number of samples of the summarized signal
+        :param stats: statistics of the signal (see signal_stats.compute_signal_stats)
+        """
+        self.levels = levels
+        self.num_samples = num_samples
+        self.stats = stats
+
+    def store(self, key, cache=None):
+        """
+        Write the pyramid and the statistics of the signal to the on-disk cache.
+        """
+        cache = cache or pyramid_cache
+        arrays = {}
+        for idx, level in enumerate(self.levels):
+            for name in ('min', 'max', 'rms'):
+                arrays[f"level{idx}_{name}"] = level[name]
+        meta = {'block_sizes': [level['block_size'] for level in self.levels], 'num_samples': self.num_samples,
+                'stats': self.stats}
+        cache.store(key, arrays, meta)
+
+    @classmethod
+    def load_cached(cls, key, cache=None):
+        """
+        Return the memory-mapped pyramid from the on-disk cache or None.
+        """
+        cached = (cache or pyramid_cache).load(key)
+        if cached is None:
+            return None
+        arrays, meta = cached
+        if 'percentiles' not in meta['stats']:
+            # pyramids of older versions only contain display statistics, they are built again
+            return None
+        levels = [{'block_size': block_size, 'min': arrays[f"level{idx}_min"], 'max': arrays[f"level{idx}_max"],
+                   'rms': arrays[f"level{idx}_rms"]} for idx, block_size in enumerate(meta['block_sizes'])]
+        return cls(levels, meta['num_samples'], meta['stats'])
+
+    @classmethod
+    def build(cls, data, progress_callback=None, cancel_event=None, chunk_size=2 ** 20):
+        """
+        Build the pyramid and the statistics of a signal (SampleSource or array) in one vectorized pass over its
+        chunks.
+        """
+        num_samples = len(data)
+        chunk_size = max(chunk_size // cls.BASE_BLOCK_SIZE, 1) * cls.BASE_BLOCK_SIZE
+        stats = SignalStatsAccumulator(num_samples)
+        mins, maxs, mean_squares = [], [], []
+        for chunk_start in range(0, num_samples, chunk_size):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            samples = np.asarray(data[chunk_start:min(chunk_start + chunk_size, num_samples)])
+            # the statistics use the samples in their original precision
+            stats.add(chunk_start, samples)
+            chunk = samples.astype(np.float32, copy=False)
+            blocks = _pad_to_blocks(chunk, cls.BASE_BLOCK_SIZE)
+            mins.append(blocks.min(axis=1))
+            maxs.append(blocks.max(axis=1))
+            mean_squares.append(np.mean(np.square(blocks, dtype=np.float64), axis=1).astype(np.float32))
+            if progress_callback is not None:
+                progress_callback(min(chunk_start + chunk_size, num_samples) / num_samples)
+
+        if len(mins) == 0:
+            return cls([], num_samples, stats.result())
+        level_min, level_max, level_ms = np.concatenate(mins), np.concatenate(maxs), np.concatenate(mean_squares)
+        block_size = cls.BASE_BLOCK_SIZE
+        levels = []
+        while True:
+            levels.append({'block_size': block_size, 'min': level_min, 'max': level_max, 'rms': np.sqrt(level_ms),
+                           'mean_square': level_ms})
+            if len(level_min) < cls.MIN_BLOCKS * cls.FACTOR:
+                break
+            level_min = _pad_to_blocks(level_min, cls.FACTOR).min(axis=1)
+            level_max = _pad_to_blocks(level_max, cls.FACTOR).max(axis=1)
+            level_ms = _pad_to_blocks(level_ms, cls.FACTOR).mean(axis=1)
+            block_size *= cls.FACTOR
+
+        for level in levels:
+            del level['mean_square']
+        return cls(levels, num_samples, stats.result())
+
+    @classmethod
+    def build_async(cls, data, callback, cache_key=None):
+        """
+        Build the pyramid in a background thread and call callback(pyramid) from that thread when it is ready. If
+        cache_key is given, the pyramid is also written to the on-disk cache.
+
+        Returns a threading.Event that can be set to cancel building.
+        """
+        cancel_event = threading.Event()
+
+        def _build():
+            try:
+                pyramid = cls.build(data, cancel_event=cancel_event)
+                if pyramid is None:
+                    return
+                if cache_key is not None:
+                    pyramid.store(cache_key)
+                if not cancel_event.is_set():
+                    callback(pyramid)
+            finally:
+                with _pending_builds_lock:
+                    _pending_builds.pop(cancel_event, None)
+
+        # the build is registered before it can finish, so it always removes its own entry
+        with _pending_builds_lock:
+            _pending_builds[cancel_event] = _executor.submit(_build)
+        return cancel_event
+
+    def select_level(self, samples_per_pixel):
+        """
+        Return the coarsest level whose blocks are not larger than one pixel, or None if single samples should be
+        drawn.
+        """
+        selected = None
+        for level in self.levels:
+            if level['block_size'] <= samples_per_pixel:
+                selected = level
+        return selected
+
+    def get_range(self, level, start, stop):
+        """
+        Return (first sample index, minima, maxima) of all blocks of a level that overlap the samples [start, stop).
+        """
+        block_size = level['block_size']
+        first_block = start // block_size
+        last_block = int(np.ceil(stop / block_size))
+        return first_block * block_size, level['min'][first_block:last_block], level['max'][first_block:last_block]
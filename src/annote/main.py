@@ -6,6 +6,7 @@ from pathlib import Path
 import flammkuchen as fl
 import os
 from datetime import datetime
+from functools import partial
 from pkg_resources import resource_filename
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -48,6 +49,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.menu_extras.addAction("Export Annotations (.csv)", self._export_annotated_events_csv)
         self.menu_extras.addAction("Export Annotations (.wav)", self._export_annotated_events_wav)
         self.menu_extras.addAction("Export Log (.txt)", self._export_log)
+        self.menu_extras.addAction("Clear cache", self._clear_cache)
 
         # variables for "Extras" menu point
         self.labels_file_window = None
@@ -160,6 +162,8 @@ class MainWindow(QtWidgets.QMainWindow):
             self.save_path = None
             for i in reversed(range(self.main_layout.count())):
                 self.main_layout.itemAt(i).widget().setParent(None)
+            helpers.waveform_pyramid.cancel_pyramid_builds()
+            self.data_handler.close()
             self.data_handler = helpers.DataHandler(data, labels)
             self._init_ui()
 
@@ -177,7 +181,6 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         annote_file_path = Path(fn)
-        self.save_path = annote_file_path
 
         df = fl.load(str(annote_file_path))
 
@@ -187,8 +190,11 @@ class MainWindow(QtWidgets.QMainWindow):
         # Log dictionary
         log = df['Log']
 
-        # Load data
-        data = {}
+        # Check that all data files exist, then load them in the background. The loading jobs also check that the
+        # files are unchanged, so the files are only hashed in the worker threads.
+        jobs = {}
+        paths = {}
+        entries = {}
         for idx, key in enumerate(df['Data_Information'].keys()):
             entry = df['Data_Information'][key]
             file_path = entry['path']
@@ -196,37 +202,73 @@ class MainWindow(QtWidgets.QMainWindow):
                 file_path = self._select_correct_file(file_path, f"File at location '{file_path}' does not exist! "
                                                                  f"Please select a valid file.")
 
-            if helpers.get_md5_hash(entry['path']) != entry['hash']:
-                    file_path = self._select_correct_file(file_path,  f"File at location '{file_path}' is not the "
-                                                                      f"same as the saved one! "
-                                                                      f"Please select the same file.")
-
-            if ".wav" in file_path or ".mp3" in file_path:
-                d = helpers.data_loading.load_wav_mp3_file(file_path, entry['channel'])
-            elif ".csv" in file_path:
-                d = helpers.data_loading.load_csv_file(file_path, entry['t_column_name'], entry['data_column_name'])
-            else:
+            # old .annote files only contain an MD5 hash, the loaders handle both formats
+            job = self._get_loading_job(file_path, entry, entry['hash'])
+            if job is None:
                 self.show_error_messagebox("Error when loading data files.")
                 return
+            jobs[f'{idx}'] = job
+            paths[f'{idx}'] = file_path
+            entries[f'{idx}'] = entry
+
+        self.loader = helpers.BackgroundLoader(jobs)
+        self.loader.file_changed.connect(lambda key, path: self._reload_changed_file(key, path, entries[key]))
+        self.loader.finished.connect(lambda data: self._open_loaded_data(data, labels, log,
+                                                                         df['Annotations_DataFrame'],
+                                                                         annote_file_path))
+        self.loader.failed.connect(lambda key, error: self.show_error_messagebox(error))
+        loading_dialog = widgets.LoadingDialog(self.loader, paths, self)
+        self.loader.start()
+        loading_dialog.exec()
 
-            if type(d) == str:
-                self.show_error_messagebox(d)
-            else:
-                data[f'{idx}'] = d
+    @staticmethod
+    def _get_loading_job(file_path, entry, expected_fingerprint=None):
+        """
+        Return the job (function, args) of the BackgroundLoader that loads a data file of a .annote file, or None if
+        the file type is not supported.
+        """
+        if ".wav" in file_path or ".mp3" in file_path:
+            return (partial(helpers.data_loading.load_wav_mp3_file, expected_fingerprint=expected_fingerprint),
+                    (file_path, entry['channel']))
+        elif ".csv" in file_path:
+            return (partial(helpers.data_loading.load_csv_file, expected_fingerprint=expected_fingerprint),
+                    (file_path, entry['t_column_name'], entry['data_column_name']))
+        return None
+
+    def _reload_changed_file(self, key, file_path, entry):
+        """
+        Let the user select the correct file when a data file changed since the .annote file was saved, and load only
+        that file again. Loading is cancelled if no file is selected.
+        """
+        file_path = self._select_correct_file(file_path, f"File at location '{file_path}' is not the same as the "
+                                                         f"saved one! Please select the same file.")
+        job = self._get_loading_job(file_path, entry) if file_path else None
+        if job is None:
+            self.loader.cancel()
+            return
+        self.loader.retry(key, *job)
 
-        # Load annotations
+    def _open_loaded_data(self, data, labels, log, annotations, annote_file_path):
+        """
+        Build the main window from the data that was loaded in the background and load the annotations.
+
+        The save path only changes to the opened .annote file here, so a cancelled or failed loading keeps the
+        current session and its save path.
+        """
         if self.initialized is False:
             self.data_handler = helpers.DataHandler(data, labels, log)
             self._init_ui()
-            self.data_handler.load_annotations(df['Annotations_DataFrame'])
+            self.data_handler.load_annotations(annotations)
             self.initialized = True
         else:
-            self.save_path = None
             for i in reversed(range(self.main_layout.count())):
                 self.main_layout.itemAt(i).widget().setParent(None)
+            helpers.waveform_pyramid.cancel_pyramid_builds()
+            self.data_handler.close()
             self.data_handler = helpers.DataHandler(data, labels, log)
             self._init_ui()
-            self.data_handler.load_annotations(df['Annotations_DataFrame'])
+            self.data_handler.load_annotations(annotations)
+        self.save_path = annote_file_path
 
     @staticmethod
     def _select_correct_file(path, message):
@@ -290,6 +332,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.close_annotation_statistics_window()
         if not self._ask_save():
             a0.ignore()
+            return
+        # queued pyramid builds would otherwise keep the application running until they are finished
+        helpers.waveform_pyramid.cancel_pyramid_builds(shutdown=True)
+        if self.data_handler is not None:
+            self.data_handler.close()
 
     ##################################################################################
     # Extras
@@ -428,6 +475,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.data_handler.save_log(fn)
         self.saving_successful_messagebox(fn)
 
+    def _clear_cache(self):
+        """
+        Remove all cached fingerprints, parsed csv columns and waveform pyramids.
+        """
+        reply = QtWidgets.QMessageBox.question(self, 'Clear cache', 'Remove all cached data? Files will be loaded '
+                                                                    'slower the next time they are opened.',
+                                               QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No,
+                                               QtWidgets.QMessageBox.StandardButton.No)
+        if reply == QtWidgets.QMessageBox.StandardButton.Yes:
+            helpers.data_loading.clear_caches()
+
     def saving_successful_messagebox(self, path):
         """
         Shows a message box that the saving was successful.
@@ -490,7 +548,8 @@ class MainWindow(QtWidgets.QMainWindow):
         # Add all shortcuts
         keys_and_functions = [(Qt.Key.Key_Return, self._add_event), (Qt.Key.Key_Left, self._previous_event),
                               (Qt.Key.Key_Right, self._next_event), (Qt.Key.Key_Delete, self._delete_row),
-                              (Qt.Key.Key_Backspace, self._delete_row), ("Ctrl+S", self._save)]
+                              (Qt.Key.Key_Backspace, self._delete_row), ("Ctrl+S", self._save),
+                              ("Ctrl+G", self._event_at_playhead)]
         if self.player is not None:
             keys_and_functions.append((Qt.Key.Key_Space, self.player.player_buttons_widget.toggle_play))
 
@@ -517,6 +576,9 @@ class MainWindow(QtWidgets.QMainWindow):
     def _next_event(self):
         self.data_handler.select_previous_or_next_event(+1)
 
+    def _event_at_playhead(self):
+        self.data_handler.select_event_at_playhead()
+
     def _add_precise_event(self):
         pressed_key = self.sender().key().toString()
         idx = 0
@@ -556,6 +618,11 @@ def main():
     """
     Main method to start the GUI.
     """
+    if '--clear-cache' in sys.argv[1:]:
+        helpers.data_loading.clear_caches()
+        print("ANNOTE cache cleared.")
+        sys.exit(0)
+
     sys.excepthook = except_hook
     app = QtWidgets.QApplication(sys.argv)
     # Force the style to be the same on all OSs:
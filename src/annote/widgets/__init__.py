@@ -4,4 +4,5 @@ from .annotate_buttons_widget import AnnotateButtonsWidget
 from .player_controls import PlayerControls
 from .annotation_statistics_widget import AnnotationsStatisticsWindow
 from .labels_file_widget import LabelsFileWindow
-from .import_widget import ImportWindow
\ No newline at end of file
+from .import_widget import ImportWindow
+from .loading_dialog import LoadingDialog
\ No newline at end of file
@@ -27,6 +27,10 @@ class AnnotateButtonsWidget(QtWidgets.QFrame):
         next_event_button.clicked.connect(self.next_event)
         self.container.addWidget(next_event_button)
 
+        playhead_event_button = QtWidgets.QPushButton('(Ctrl+G) - Event at Playhead')
+        playhead_event_button.clicked.connect(self.event_at_playhead)
+        self.container.addWidget(playhead_event_button)
+
         self.main_layout.addLayout(self.container)
 
         self.classes_buttons_layout = QtWidgets.QGridLayout()
@@ -79,6 +83,9 @@ class AnnotateButtonsWidget(QtWidgets.QFrame):
     def previous_event(self):
         self._data_handler.select_previous_or_next_event(-1)
 
+    def event_at_playhead(self):
+        self._data_handler.select_event_at_playhead()
+
     def annotate_event_button_pressed(self):
         string = self.sender().text()
         start = string.find(")")
@@ -1,13 +1,19 @@
-from PyQt6 import QtWidgets
+from PyQt6 import QtWidgets, QtCore
 from PyQt6.QtMultimedia import QMediaPlayer
 import pyqtgraph as pg
 import math
+from pathlib import Path
+
+from ..helpers.annotation_overlay import AnnotationOverlay
+from ..helpers.sample_source import get_channel_options
+from .lane_manager import LaneManager, SpectrogramPlotLane, WaveformPlotLane
 
 
 class AnnotatePreciseWidget(QtWidgets.QFrame):
     """
     Class containing the plot and the region that can be arbitrarily slided by the user.
     """
+    OVERLAY_CHANNELS = "Overlay of channels"
     def __init__(self, audio_player, data_handler):
         super().__init__()
         if audio_player is not None:
@@ -24,32 +30,66 @@ class AnnotatePreciseWidget(QtWidgets.QFrame):
         """
         self.main_layout = QtWidgets.QVBoxLayout(self)
 
-        self.plot_widget = pg.GraphicsLayoutWidget()
-
-        # Add all plots
-        self.max_duration = 0
-        self.plots = []
-        for idx, key in enumerate(self.data_handler.data.keys()):
-            entry = self.data_handler.data[key]
-            plot = self.plot_widget.addPlot(row=idx+1, col=0)
-            plot.setYRange(-max(entry['data']), max(entry['data']), padding=0)
-            plot.setMouseEnabled(x=True, y=False)
-            self.plots.append(plot)
-
-            if self.data_handler.data[key]['duration'] > self.max_duration:
-                self.max_duration = self.data_handler.data[key]['duration']
-
-            if len(self.plots) > 0:
-                plot.setXLink(self.plots[idx - 1])
+        # Channel views of files with more than one channel can be switched without loading the file again
+        self.channel_combo_boxes = {}
+        channel_layout = QtWidgets.QHBoxLayout()
+        for key, entry in self.data_handler.data.items():
+            # the selector offers the same channel options as the import window for the channels of the file
+            num_channels = getattr(entry['data'], 'num_channels', 1)
+            options = get_channel_options(num_channels)
+            if len(options) < 2:
+                continue
+            if num_channels == 2:
+                options.append(self.OVERLAY_CHANNELS)
+            combo_box = QtWidgets.QComboBox()
+            combo_box.addItems(options)
+            combo_box.setCurrentText(entry['channel'])
+            combo_box.currentTextChanged.connect(lambda text, key=key: self.set_channel_view(key, text))
+            channel_layout.addWidget(QtWidgets.QLabel(f"{Path(entry['path']).name}:"))
+            channel_layout.addWidget(combo_box)
+            self.channel_combo_boxes[key] = combo_box
+        if len(self.channel_combo_boxes) > 0:
+            channel_layout.addStretch()
+            channel_widget = QtWidgets.QWidget()
+            channel_widget.setLayout(channel_layout)
+            # with many files the selectors don't fit next to each other, so the row can be scrolled
+            channel_scroll_area = QtWidgets.QScrollArea()
+            channel_scroll_area.setWidget(channel_widget)
+            channel_scroll_area.setWidgetResizable(True)
+            channel_scroll_area.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
+            channel_scroll_area.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+            channel_scroll_area.setFixedHeight(channel_widget.sizeHint().height() +
+                                               channel_scroll_area.horizontalScrollBar().sizeHint().height())
+            self.main_layout.addWidget(channel_scroll_area)
+
+        # One waveform lane per signal and a spectrogram lane under every audio signal. The lane manager only
+        # renders the lanes that are scrolled into view.
+        self.max_duration = max(entry['duration'] for entry in self.data_handler.data.values())
+        lanes = []
+        for key, entry in self.data_handler.data.items():
+            lanes.append(WaveformPlotLane(key, entry))
+            if 'sampling_rate' in entry:
+                lanes.append(SpectrogramPlotLane(key, entry))
+        self.lane_manager = LaneManager(lanes, self)
+        self.plot_widget = self.lane_manager.plot_widget
+        self.plots = self.lane_manager.plots
 
         # Set size policy
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
-        self.plot_widget.setSizePolicy(sizePolicy)
-        self.main_layout.addWidget(self.plot_widget)
+        self.lane_manager.setSizePolicy(sizePolicy)
+        self.main_layout.addWidget(self.lane_manager)
+
+        # One overlay per plot draws all annotated events of the visible range
+        self.overlays = []
+        for plot in self.plots:
+            overlay = AnnotationOverlay(self.data_handler)
+            overlay.setZValue(10)
+            plot.addItem(overlay, ignoreBounds=True)
+            self.overlays.append(overlay)
 
         # Region that can be arbitrarily slided by the user
         self.regions = []
-        for _ in range(len(self.data_handler.data.keys())):
+        for _ in range(len(self.plots)):
             region = pg.LinearRegionItem()
             region.setRegion([0, self._get_region_size(self.max_duration)])
             region.setBrush(pg.mkColor((102, 102, 255, 255)))
@@ -62,34 +102,16 @@ class AnnotatePreciseWidget(QtWidgets.QFrame):
 
         self.setLayout(self.main_layout)
 
-        for plot, key in zip(self.plots, self.data_handler.data.keys()):
-            t = self.data_handler.data[key]['t']
-            data = self.data_handler.data[key]['data']
-            x_labels = list(self.data_handler.data[key].get('t_labels', None))
-            
-            if x_labels is not None:
-                x_labels = x_labels[::100]
-                t_copy = t.copy()[::100]
-                for label, x in zip(x_labels, t_copy):
-                    text_item = pg.TextItem(text=str(label), anchor=(0.5, 1.0))
-                    plot.addItem(text_item)
-                    text_item.setPos(x, - max(data))
-            else:
-                plot.hideAxis('bottom')
-
-            plot.plot(t, data, pen=(255, 153, 0))
+        for plot in self.plots:
             plot.setXRange(0, self.max_duration)
             range_ = plot.getViewBox().viewRange()
-            plot.getViewBox().setLimits(xMin=range_[0][0], xMax=range_[0][1],
-                        yMin=range_[1][0], yMax=range_[1][1])
-            plot.setDownsampling(True, True)
-            plot.setClipToView(True)
-            plot.hideAxis('left')
-                
+            plot.getViewBox().setLimits(xMin=range_[0][0], xMax=range_[0][1])
+        self.lane_manager.scroll_to(0)
 
         self.data_handler.regions = self.regions
         self.data_handler.plots = self.plots
         self.data_handler.max_duration = self.max_duration
+        self.data_handler.overlays = self.overlays
 
     def update_region_from_player(self):
         """
@@ -119,6 +141,28 @@ class AnnotatePreciseWidget(QtWidgets.QFrame):
             if region != sender_region:
                 region.setRegion([min_x, max_x])
 
+    def set_channel_view(self, key, channel):
+        """
+        Show another channel option of a file or overlay all of its channels.
+
+        The views share the loaded samples, so switching is instant. The statistics of the new channel option are
+        taken from its (cached or background-built) pyramid by the waveform lane. Choosing a single channel option
+        also changes the channel that is exported and saved.
+        """
+        entry = self.data_handler.data[key]
+        if channel == self.OVERLAY_CHANNELS:
+            channels = list(WaveformPlotLane.CHANNEL_PENS.keys())
+        else:
+            entry['data'] = entry['data'].with_channel(channel)
+            entry['channel'] = channel
+            entry['stats'] = None
+            channels = [channel]
+        for lane in self.lane_manager.lanes_of(key):
+            if isinstance(lane, WaveformPlotLane):
+                lane.set_channels(channels)
+            else:
+                lane.refresh()
+
     def _get_region_size(self, x):
         """
         Method for calculating the region size depending on the current x position.
@@ -1,11 +1,13 @@
 from PyQt6 import QtWidgets, QtGui, QtCore
 import pyqtgraph as pg
-import pandas as pd
 
 
 class AnnotationsStatisticsWindow(QtWidgets.QWidget):
     """
     Class containing everything to display how many events were annotated yet.
+
+    The plot, the bar graph and the table items are created once, reload_graph only sets the statistics that the
+    AnnotationStore keeps up to date for every class.
     """
     def __init__(self, main_window):
         """
@@ -15,8 +17,9 @@ class AnnotationsStatisticsWindow(QtWidgets.QWidget):
         self.main_window = main_window
         self.table = None
         self.flag = 'length'
-        self.labels_from_table = pd.unique(self.main_window.data_handler.table_data['Event']
-                                [self.main_window.data_handler.table_data['Event'] != ''])
+        self.labels_from_table = list(dict.fromkeys(event for event in
+                                                    self.main_window.data_handler.annotations.column('Event')
+                                                    if event != ''))
         self.labels_from_file = self.main_window.data_handler.labels["classes"]
         self.labels = list(set(self.labels_from_table).union(self.labels_from_file))
         self.init_ui()
@@ -51,8 +54,21 @@ class AnnotationsStatisticsWindow(QtWidgets.QWidget):
         self.table.setColumnCount(1)
         self.table.horizontalHeader().setVisible(False)
         self.table.setEditTriggers(QtWidgets.QTableWidget.EditTrigger.NoEditTriggers)
+        for idx in range(len(self.labels)):
+            self.table.setItem(idx, 0, QtWidgets.QTableWidgetItem())
+
+        self.plot = self.plot_widget.addPlot(row=1, col=0, axisItems={'left': self.y_axis})
+        self.bar_graph = pg.BarGraphItem(width=[0] * len(self.labels), y=range(len(self.labels)), x0=0, height=0.8)
+        self.plot.addItem(self.bar_graph, ignoreBounds=True)
+
+        y_range = len(self.labels)
+        self.plot.setYRange(-1, y_range, padding=0)
+        self.plot.setXRange(0, 1, padding=0)
+        self.plot.setMouseEnabled(x=False, y=False)
+        self.plot.hideAxis('bottom')
+        view_box = self.plot.getViewBox()
+        view_box.setLimits(xMin=0, xMax=1, yMin=-1, yMax=10)
 
-        self.plot = None
         self.reload_graph()
 
         self.main_layout.addWidget(self.plot_widget)
@@ -78,35 +94,17 @@ class AnnotationsStatisticsWindow(QtWidgets.QWidget):
         """
         Method to reload the graph.
         """
-        if self.plot is not None:
-            self.plot_widget.removeItem(self.plot)
-
-        self.plot = self.plot_widget.addPlot(row=1, col=0, axisItems={'left': self.y_axis})
-
         x = self.main_window.data_handler.get_statistics_data(self.labels, self.flag)
-        if max(x) != 0:
+        if max(x, default=0) != 0:
             x = x / max(x)
 
-        if self.flag == 'count':
-            self.bar_graph = pg.BarGraphItem(width=x, y=range(len(x)), x0=0, x1=1, height=0.8, brush=QtGui.QColor('lightgreen'))
-        else:
-            self.bar_graph = pg.BarGraphItem(width=x, y=range(len(x)), x0=0, x1=1, height=0.8, brush=QtGui.QColor('lightblue'))
-
-        self.plot.addItem(self.bar_graph, ignoreBounds=True)
-
-        y_range = len(self.labels)
-        self.plot.setYRange(-1, y_range, padding=0)
-        self.plot.setXRange(0, 1, padding=0)
-        self.plot.setMouseEnabled(x=False, y=False)
-        self.plot.hideAxis('bottom')
-        view_box = self.plot.getViewBox()
-        view_box.setLimits(xMin=0, xMax=1, yMin=-1, yMax=10)
+        brush = QtGui.QColor('lightgreen') if self.flag == 'count' else QtGui.QColor('lightblue')
+        self.bar_graph.setOpts(width=x, brush=brush)
 
-        # reload event count
+        # reload event count, the rows of the table are in reversed order
         x = self.main_window.data_handler.get_statistics_data(self.labels, 'count')
-        for idx in range(len(self.labels)):
-            item = QtWidgets.QTableWidgetItem(str(int(x[::-1][idx])))
-            self.table.setItem(idx-1, 1, item)
+        for idx, count in enumerate(x[::-1]):
+            self.table.item(idx, 0).setText(str(int(count)))
 
     def closeEvent(self, a0: QtGui.QCloseEvent) -> None:
         """
@@ -6,6 +6,9 @@ import glob
 
 from ..helpers.data_loading import load_wav_mp3_file_metadata, load_csv_metadata, load_labels, \
     load_wav_mp3_file, load_csv_file
+from ..helpers.background_loader import BackgroundLoader
+from ..helpers.sample_source import get_channel_options
+from .loading_dialog import LoadingDialog
 
 
 class ImportWindow(QtWidgets.QWidget):
@@ -16,7 +19,6 @@ class ImportWindow(QtWidgets.QWidget):
     def __init__(self, main_window):
         super(ImportWindow, self).__init__()
         self.main_window = main_window
-        self.channel_options = ["Left channel", "Right channel", "Average of channels"]
         self.init_ui()
 
         # Check if there is already a Labels file saved in the settings
@@ -46,6 +48,18 @@ class ImportWindow(QtWidgets.QWidget):
         line = QtWidgets.QFrame()
         line.setFrameShape(QtWidgets.QFrame.Shape.HLine)
         self.selected_files_layout.addWidget(line)
+
+        # Any number of files can be added, so the list of selected files is scrollable
+        self.file_entries_layout = QtWidgets.QVBoxLayout()
+        self.file_entries_layout.addStretch()
+        file_entries_widget = QtWidgets.QWidget()
+        file_entries_widget.setLayout(self.file_entries_layout)
+        self.file_entries_scroll_area = QtWidgets.QScrollArea()
+        self.file_entries_scroll_area.setWidgetResizable(True)
+        self.file_entries_scroll_area.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
+        self.file_entries_scroll_area.setMinimumHeight(150)
+        self.file_entries_scroll_area.setWidget(file_entries_widget)
+        self.selected_files_layout.addWidget(self.file_entries_scroll_area)
         self.main_layout.addLayout(self.selected_files_layout)
 
         # Layout to select the labels file that should be used
@@ -90,9 +104,6 @@ class ImportWindow(QtWidgets.QWidget):
         if not os.path.exists(path):
             self.show_error_messagebox(f"File {path} does not exist.")
             return
-        elif len(self.files_to_load_layouts) + 1 > 3:
-            self.show_error_messagebox(f"Can't load more than three files.")
-            return
         elif ".mp3" in path or ".wav" in path:
             combo_box_channel = QtWidgets.QComboBox()
 
@@ -105,11 +116,7 @@ class ImportWindow(QtWidgets.QWidget):
             layout.addWidget(sr_label, 1, 1)
 
             # Combo box to let the user select the data they want to have displayed
-            if d['num_channels'] == 2:
-                for item in self.channel_options:
-                    combo_box_channel.addItem(item)
-            else:
-                combo_box_channel.addItem("Single channel")
+            combo_box_channel.addItems(get_channel_options(d['num_channels']))
 
             # Add combo box
             layout.addWidget(combo_box_channel, 2, 0, 1, 2)
@@ -152,14 +159,15 @@ class ImportWindow(QtWidgets.QWidget):
         layout.addWidget(line, 3, 0, 1, 3)
 
         self.files_to_load_layouts[remove_button] = {'layout': layout, 'path': str(path), 'combo_box': combo_box}
-        self.selected_files_layout.addLayout(layout)
+        # insert before the stretch, so the entries stay at the top of the list
+        self.file_entries_layout.insertLayout(self.file_entries_layout.count() - 1, layout)
         self.data_file_text_box.setText("")
 
     def _remove_file_entry(self):
         layout = self.files_to_load_layouts[self.sender()]['layout']
         self._clear_layout(layout)
         self.files_to_load_layouts.__delitem__(self.sender())
-        self.layout().removeItem(layout)
+        self.file_entries_layout.removeItem(layout)
         layout.setParent(None)
 
     def _clear_layout(self, layout):
@@ -233,16 +241,28 @@ class ImportWindow(QtWidgets.QWidget):
             self.show_error_messagebox(labels)
             return
 
-        # Load all data files
-        data = {}
+        # Load all data files in the background
+        jobs = {}
+        paths = {}
         for idx, key in enumerate(self.files_to_load_layouts):
             entry = self.files_to_load_layouts[key]
-            try:
-                data[f'{idx}'] = self._get_data(entry)
-            except Exception as e:
-                self.show_error_messagebox(f"Error occured: {e}")
+            job = self._get_loading_job(entry)
+            if job is None:
                 return
+            jobs[f'{idx}'] = job
+            paths[f'{idx}'] = entry['path']
+
+        self.loader = BackgroundLoader(jobs)
+        self.loader.finished.connect(lambda data: self._data_loaded(data, labels))
+        self.loader.failed.connect(lambda key, error: self.show_error_messagebox(f"Error occured: {error}"))
+        self.loading_dialog = LoadingDialog(self.loader, paths, self)
+        self.loader.start()
+        self.loading_dialog.exec()
 
+    def _data_loaded(self, data, labels):
+        """
+        Method called as soon as all data files were loaded in the background.
+        """
         self.main_window.load_main_window(data, labels)
         self.close()
 
@@ -253,14 +273,16 @@ class ImportWindow(QtWidgets.QWidget):
         msg.setIcon(QtWidgets.QMessageBox.Icon.Critical)
         msg.exec()
 
-    def _get_data(self, entry):
+    def _get_loading_job(self, entry):
         """
-        This method loads data dictionaries.
+        This method returns the function and arguments that load the data dictionary of an entry.
+
+        The selected options are read here because the job itself runs in a background thread.
         """
         if ".wav" in entry['path'] or ".mp3" in entry['path']:
-            return load_wav_mp3_file(entry['path'], entry['combo_box'][0].currentText())
+            return load_wav_mp3_file, (entry['path'], entry['combo_box'][0].currentText())
         elif ".csv" in entry['path']:
-            return load_csv_file(entry['path'], entry['combo_box'][0].currentText(),
-                                 entry['combo_box'][1].currentText())
+            return load_csv_file, (entry['path'], entry['combo_box'][0].currentText(),
+                                   entry['combo_box'][1].currentText())
         else:
             self.show_error_messagebox("Error when loading data files.")
@@ -0,0 +1,246 @@
+from PyQt6 import QtWidgets, QtCore
+from pathlib import Path
+import pyqtgraph as pg
+
+from ..helpers.datetime_axis import DateTimeAxisItem
+from ..helpers.signal_curve import SignalCurve
+from ..helpers.spectrogram_lane import SpectrogramLane
+from ..helpers.waveform_pyramid import WaveformPyramid, pyramid_cache_key
+
+
+class PlotLane:
+    """
+    Base class for the content of a lane (e.g. the waveform of a signal).
+
+    Lanes only create their graphics items while they are bound to one of the plots of the LaneManager, so lanes
+    that are scrolled out of view don't use memory or time for drawing.
+    """
+    def __init__(self, key, entry):
+        self.key = key
+        self.entry = entry
+        self.plot = None
+
+    @property
+    def name(self):
+        return Path(self.entry['path']).name
+
+    def bind(self, plot):
+        """
+        Show the lane in a plot.
+        """
+        self.plot = plot
+        self._add_items(plot)
+
+    def unbind(self):
+        """
+        Remove all graphics items of the lane from its plot.
+        """
+        if self.plot is not None:
+            self._remove_items(self.plot)
+            self.plot = None
+
+    def refresh(self):
+        """
+        Recreate the graphics items (e.g. after the channel option changed).
+        """
+        if self.plot is not None:
+            plot = self.plot
+            self.unbind()
+            self.bind(plot)
+
+    def _add_items(self, plot):
+        raise NotImplementedError
+
+    def _remove_items(self, plot):
+        raise NotImplementedError
+
+
+class WaveformPlotLane(PlotLane):
+    """
+    Lane showing the waveform of one or more channel options of a signal.
+
+    Audio files whose pyramid wasn't cached are loaded without statistics ('stats' is None). They are filled in from
+    the pyramid once it was built in the background, then the y-range is fitted to them.
+    """
+    DEFAULT_PEN = (255, 153, 0)
+    CHANNEL_PENS = {"Left channel": (255, 153, 0), "Right channel": (102, 204, 255)}
+
+    def __init__(self, key, entry):
+        super().__init__(key, entry)
+        self.channels = [entry.get('channel')]
+        self._curves = []
+        # pyramids stay available when the lane is scrolled out of view and back in
+        self._pyramids = {}
+
+    def set_channels(self, channels):
+        """
+        Show other channel options of the signal (None shows the channel option of the entry).
+        """
+        self.channels = channels
+        self.refresh()
+
+    def _add_items(self, plot):
+        for channel in self.channels:
+            data = self.entry['data'] if channel is None else self.entry['data'].with_channel(channel)
+            # pyramid and display statistics of files that were opened before are memory-mapped from the cache
+            cache_key = pyramid_cache_key(self.entry, channel)
+            if cache_key not in self._pyramids:
+                self._pyramids[cache_key] = WaveformPyramid.load_cached(cache_key)
+            pyramid = self._pyramids[cache_key]
+            if pyramid is not None:
+                self._fill_entry_stats(channel, pyramid)
+
+            pen = self.CHANNEL_PENS.get(channel, self.DEFAULT_PEN) if len(self.channels) > 1 else self.DEFAULT_PEN
+            # the curve only reads the samples of the visible range from the (memory-mapped) sample source
+            curve = SignalCurve(self.entry['t'], data, pyramid=pyramid, cache_key=cache_key, pen=pen)
+            curve.pyramid_changed.connect(lambda pyramid, channel=channel: self._on_pyramid_ready(channel, pyramid))
+            curve.attach(plot)
+            self._curves.append(curve)
+        self._update_y_range()
+
+        # datetime time columns get date and time labels that are generated for the visible range only
+        epoch_offset = self.entry.get('epoch_offset')
+        plot.getAxis('bottom').set_epoch_offset(epoch_offset)
+        if epoch_offset is not None:
+            plot.showAxis('bottom')
+        else:
+            plot.hideAxis('bottom')
+
+    def _remove_items(self, plot):
+        for curve in self._curves:
+            if curve.pyramid is not None:
+                self._pyramids[curve.cache_key] = curve.pyramid
+            curve.detach()
+        self._curves = []
+
+    def _on_pyramid_ready(self, channel, pyramid):
+        """
+        Method called when the pyramid of a curve was built in the background.
+        """
+        self._fill_entry_stats(channel, pyramid)
+        self._update_y_range()
+
+    def _fill_entry_stats(self, channel, pyramid):
+        """
+        Fill in the missing statistics of the entry from the pyramid of its channel option.
+        """
+        if (channel is None or channel == self.entry.get('channel')) and self.entry.get('stats') is None:
+            self.entry['stats'] = pyramid.stats
+
+    def _update_y_range(self):
+        """
+        Fit the y-range to the statistics of the shown channel options.
+
+        Statistics of other channel options are taken from their pyramids, so they are never computed in the GUI
+        thread. Until they are known (the pyramid is still built in the background), the y-range follows the visible
+        samples and is updated when the pyramid is ready.
+        """
+        if self.plot is None:
+            return
+        stats = [self._get_stats(channel, curve.pyramid) for channel, curve in zip(self.channels, self._curves)]
+        stats = [channel_stats for channel_stats in stats if channel_stats is not None]
+        if len(stats) == 0:
+            self.plot.getViewBox().setLimits(yMin=None, yMax=None)
+            self.plot.enableAutoRange(axis='y')
+            return
+        y_max = max(channel_stats['abs_max'] for channel_stats in stats)
+        self.plot.getViewBox().setLimits(yMin=-y_max, yMax=y_max)
+        self.plot.setYRange(-y_max, y_max, padding=0)
+
+    def _get_stats(self, channel, pyramid):
+        """
+        Return the statistics of a channel option or None if they are not known yet.
+        """
+        if (channel is None or channel == self.entry.get('channel')) and self.entry.get('stats') is not None:
+            return self.entry['stats']
+        return pyramid.stats if pyramid is not None else None
+
+
+class SpectrogramPlotLane(PlotLane):
+    """
+    Lane showing the spectrogram of the current channel option of an audio signal.
+    """
+    def __init__(self, key, entry):
+        super().__init__(key, entry)
+        self._spectrogram = None
+
+    @property
+    def name(self):
+        return f"{super().name} (spectrogram)"
+
+    def _add_items(self, plot):
+        plot.getViewBox().setLimits(yMin=0, yMax=self.entry['sampling_rate'] / 2)
+        plot.hideAxis('bottom')
+        self._spectrogram = SpectrogramLane(self.entry['t'], self.entry['data'], self.entry['sampling_rate'],
+                                            cache_key=pyramid_cache_key(self.entry))
+        self._spectrogram.attach(plot)
+
+    def _remove_items(self, plot):
+        self._spectrogram.detach()
+        self._spectrogram = None
+
+
+class LaneManager(QtWidgets.QWidget):
+    """
+    Widget that holds any number of lanes but only renders the lanes that are scrolled into view.
+
+    A fixed pool of at most MAX_VISIBLE_LANES plots shares one x-range. Scrolling binds other lanes to the plots of
+    the pool, so memory and redraw time depend on the number of visible lanes and not on the number of loaded
+    signals. Items that don't belong to a signal (e.g. the selection region and annotations) are added to the plots
+    of the pool and therefore stay in place while scrolling.
+    """
+    MAX_VISIBLE_LANES = 6
+
+    def __init__(self, lanes, parent=None):
+        super().__init__(parent)
+        self.lanes = lanes
+        self.plot_widget = pg.GraphicsLayoutWidget()
+        self.plots = []
+        self._labels = []
+        for idx in range(min(len(lanes), self.MAX_VISIBLE_LANES)):
+            plot = self.plot_widget.addPlot(row=idx + 1, col=0, axisItems={'bottom': DateTimeAxisItem()})
+            plot.setMouseEnabled(x=True, y=False)
+            plot.hideAxis('left')
+            if idx > 0:
+                plot.setXLink(self.plots[0])
+            # the name of the bound lane is shown in the upper left corner of the plot
+            label = pg.LabelItem(justify='left', size='8pt')
+            label.setParentItem(plot.getViewBox())
+            label.anchor(itemPos=(0, 0), parentPos=(0, 0), offset=(4, 0))
+            self.plots.append(plot)
+            self._labels.append(label)
+        self._bound = [None] * len(self.plots)
+
+        self.scroll_bar = QtWidgets.QScrollBar(QtCore.Qt.Orientation.Vertical)
+        self.scroll_bar.setRange(0, max(len(lanes) - len(self.plots), 0))
+        self.scroll_bar.setPageStep(max(len(self.plots), 1))
+        self.scroll_bar.setVisible(len(lanes) > len(self.plots))
+        self.scroll_bar.valueChanged.connect(self.scroll_to)
+
+        layout = QtWidgets.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.plot_widget)
+        layout.addWidget(self.scroll_bar)
+        self.setLayout(layout)
+
+    def scroll_to(self, first_lane):
+        """
+        Bind the lanes starting at first_lane to the plots of the pool.
+        """
+        visible = self.lanes[first_lane:first_lane + len(self.plots)]
+        # all lanes that change their plot are unbound first, a lane can move to another plot while scrolling
+        for idx, lane in enumerate(self._bound):
+            if lane is not None and lane is not visible[idx]:
+                lane.unbind()
+                self._bound[idx] = None
+        for idx, lane in enumerate(visible):
+            if self._bound[idx] is None:
+                lane.bind(self.plots[idx])
+                self._bound[idx] = lane
+                self._labels[idx].setText(lane.name)
+
+    def lanes_of(self, key):
+        """
+        Return all lanes of a data entry.
+        """
+        return [lane for lane in self.lanes if lane.key == key]
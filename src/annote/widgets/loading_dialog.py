@@ -0,0 +1,52 @@
+from PyQt6 import QtWidgets, QtCore
+from pathlib import Path
+
+
+class LoadingDialog(QtWidgets.QDialog):
+    """
+    Dialog showing the loading progress of every data file with the possibility to cancel loading.
+    """
+    def __init__(self, loader, paths, parent=None):
+        """
+        :param loader: BackgroundLoader that loads the files
+        :param paths: dictionary with the key of the job and the path of the file
+        """
+        super(LoadingDialog, self).__init__(parent)
+        self.loader = loader
+        self.setWindowTitle("ANNOTE - Loading data")
+        self.setWindowModality(QtCore.Qt.WindowModality.ApplicationModal)
+        self.setMinimumWidth(400)
+
+        self.main_layout = QtWidgets.QVBoxLayout()
+        self.progress_bars = {}
+        for key, path in paths.items():
+            label = QtWidgets.QLabel(f"<b>{Path(path).name}</b>")
+            self.main_layout.addWidget(label)
+            progress_bar = QtWidgets.QProgressBar()
+            progress_bar.setRange(0, 100)
+            self.main_layout.addWidget(progress_bar)
+            self.progress_bars[key] = progress_bar
+
+        cancel_button = QtWidgets.QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+        self.main_layout.addWidget(cancel_button)
+        self.setLayout(self.main_layout)
+
+        self.loader.progress.connect(self.update_progress)
+        self.loader.finished.connect(self.accept)
+        self.loader.failed.connect(self.accept)
+        self.loader.cancelled.connect(self.reject)
+
+    def update_progress(self, key, fraction):
+        """
+        Method called whenever the loader reports progress of a file.
+        """
+        if key in self.progress_bars:
+            self.progress_bars[key].setValue(int(fraction * 100))
+
+    def reject(self):
+        """
+        Cancel loading when the dialog is closed or the cancel button is clicked.
+        """
+        self.loader.cancel()
+        super().reject()
@@ -48,26 +48,27 @@ class PlayerButtonsWidget(QtWidgets.QWidget):
         Event-method for starting/pausing playing the audio through the media player.
         """
         # check if there is a region selected
-        for _, row in self._data_handler.table_data.iterrows():
-            if row['Selected'] is True:
-                # check if the player is already playing
-                if self._audio_player.playbackState() == self._audio_player.PlaybackState.PlayingState:
-                    self._audio_player.pause()
-                else:
-                    # if there is a region selected, save the position where the player currently is
-                    if self.last_position is None:
-                        self.last_position = self._audio_player.position()
-
-                    # set information of when the player should stop
-                    # as we are playing a selected region, we need to set the end position of the region as the stop
-                    self.parent().current_end_position = row['To']
-
-                    self._audio_player.setPosition(row['From'] * 1000)
-                    self._audio_player.play()
-                self._data_handler.set_regions_movable(False)
-                self._data_handler.set_regions_visible(False)
-                self._data_handler.reload_table()
-                return
+        event_id = self._data_handler.selected_id
+        if event_id is not None:
+            row = self._data_handler.annotations.get(event_id)
+            # check if the player is already playing
+            if self._audio_player.playbackState() == self._audio_player.PlaybackState.PlayingState:
+                self._audio_player.pause()
+            else:
+                # if there is a region selected, save the position where the player currently is
+                if self.last_position is None:
+                    self.last_position = self._audio_player.position()
+
+                # set information of when the player should stop
+                # as we are playing a selected region, we need to set the end position of the region as the stop
+                self.parent().current_end_position = row['To']
+
+                self._audio_player.setPosition(row['From'] * 1000)
+                self._audio_player.play()
+            self._data_handler.set_regions_movable(False)
+            self._data_handler.set_regions_visible(False)
+            self._data_handler.update_views()
+            return
         
         # The following code is only executed if there is no region selected
         # So check if there is a previous position saved and set to that position
@@ -82,8 +83,8 @@ class PlayerButtonsWidget(QtWidgets.QWidget):
             self._audio_player.play()
             self._data_handler.set_regions_movable(False)
         self._data_handler.set_regions_visible(True)
-        self._data_handler.table_data.loc[:, 'Selected'] = False
-        self._data_handler.reload_table()
+        self._data_handler.clear_selection()
+        self._data_handler.update_views()
 
     def set_player_to_last_position(self):
         """ 